@@ -0,0 +1,137 @@
+# admission.py
+import time
+from poller import MAX_POLL_INTERVAL
+
+HEADROOM = 0.2           # share of the rate budget kept free for duel setup, !update and final checks
+FEED_CALLS_PER_TICK = 1  # the problemset.recentStatus poll every auto-check tick makes
+MIN_HANDLE_COST = 0.01   # requests per handle per tick assumed even when the feed covers every duel
+COST_SMOOTHING = 0.2     # weight of the latest tick in the moving average
+QUEUE_LIMIT = 25
+
+
+class PendingDuel:
+    """A validated duel/lockout request waiting for capacity; problems are picked when it starts."""
+    __slots__ = ("channel", "guild_id", "players", "handles", "ratings_list", "filters", "time_min",
+                 "label", "title", "queued_at")
+
+    def __init__(self, channel, guild_id, players, handles, ratings_list, filters, time_min, label, title):
+        self.channel = channel
+        self.guild_id = guild_id
+        self.players = tuple(players)
+        self.handles = tuple(handles)
+        self.ratings_list = ratings_list
+        self.filters = filters
+        self.time_min = time_min
+        self.label = label
+        self.title = title
+        self.queued_at = time.time()
+
+
+class AdmissionQueue:
+    """
+    Admission control for new duels, sized to the Codeforces API budget rather than a fixed count.
+    Load is measured in polled handles: the auto-check loop reports how many handle fetches its due
+    duels needed each tick, and a moving average of that per active handle is the polling cost.
+    Capacity is what the live scheduler spacing leaves after the feed call and some headroom, divided
+    by that cost. Requests that don't fit wait here (FIFO) and start as running duels finish.
+    """
+
+    def __init__(self, tick, max_duels, limit=QUEUE_LIMIT):
+        self.tick = tick
+        self.max_duels = max_duels  # hard cap regardless of budget
+        self.limit = limit
+        self.entries = []
+        self.starting = []          # admitted entries still picking problems
+        self.draining = False
+        # until measured, assume every handle is polled at the idle back-off rate
+        self.handle_cost = tick / MAX_POLL_INTERVAL
+
+    def observe(self, active_handles, demand):
+        """One auto-check tick: `demand` distinct handle fetches were due for `active_handles` polled handles."""
+        if active_handles:
+            cost = demand / active_handles
+            self.handle_cost += COST_SMOOTHING * (cost - self.handle_cost)
+
+    def capacity(self, interval) -> int:
+        """Handles that can be polled concurrently at the current scheduler spacing."""
+        per_tick = self.tick / max(interval, 0.1)
+        spare = per_tick * (1 - HEADROOM) - FEED_CALLS_PER_TICK
+        return max(0, int(spare / max(self.handle_cost, MIN_HANDLE_COST)))
+
+    def _load(self, load, duels):
+        return load + sum(len(e.handles) for e in self.starting), duels + len(self.starting)
+
+    def _fits(self, entry, load, duels, interval):
+        load, duels = self._load(load, duels)
+        if duels >= self.max_duels:
+            return False
+        # with nothing running, always admit one so a shrunken budget cannot stall the queue
+        return load == 0 or load + len(entry.handles) <= self.capacity(interval)
+
+    def admits(self, entry, load, duels, interval) -> bool:
+        """True if the request can start now: nobody is waiting ahead of it and the budget has room."""
+        return not self.entries and self._fits(entry, load, duels, interval)
+
+    def push(self, entry):
+        """Queue a request; returns its 1-based position, or None if the queue is full."""
+        if len(self.entries) >= self.limit:
+            return None
+        self.entries.append(entry)
+        return len(self.entries)
+
+    def pop_ready(self, load, duels, interval):
+        """Next waiting request if it fits now (marked as starting), else None."""
+        if not self.entries or not self._fits(self.entries[0], load, duels, interval):
+            return None
+        entry = self.entries.pop(0)
+        self.begin(entry)
+        return entry
+
+    def begin(self, entry):
+        """Count an admitted request's handles while it picks problems."""
+        self.starting.append(entry)
+
+    def started(self, entry):
+        """The entry's duel launched (or failed to); its load is now counted from the live sessions."""
+        if entry in self.starting:
+            self.starting.remove(entry)
+
+    def drop_players(self, players):
+        """Remove and return waiting requests involving any of these players."""
+        players = set(players)
+        dropped = [e for e in self.entries if players.intersection(e.players)]
+        if dropped:
+            self.entries = [e for e in self.entries if e not in dropped]
+        return dropped
+
+    def position_of(self, user_id):
+        for n, e in enumerate(self.entries, 1):
+            if user_id in e.players:
+                return n
+        return None
+
+    def eta(self, position, sessions, load, duels, interval, now=None) -> float:
+        """
+        Seconds until the request at 1-based `position` should start, assuming running duels last until
+        their deadlines and everyone ahead starts first.
+        """
+        now = time.time() if now is None else now
+        ahead = self.entries[:position]
+        load, duels = self._load(load, duels)
+        excess_handles = load + sum(len(e.handles) for e in ahead) - self.capacity(interval)
+        excess_duels = duels + len(ahead) - self.max_duels
+        freed_handles = freed_duels = 0
+        at = now
+        for end, n in sorted((s.end_time, len(s.handles)) for s in sessions):
+            if freed_handles >= excess_handles and freed_duels >= excess_duels:
+                break
+            freed_handles += n
+            freed_duels += 1
+            at = end
+        return max(0.0, at - now)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
@@ -0,0 +1,261 @@
+# backend.py
+import asyncio
+import json
+import itertools
+import cfapi
+import problemset
+from warmer import warmer
+from cfapi import (fetch_submissions, fetch_solves, fetch_recent_status, RecentPage, CFError,
+                   PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND)
+
+RPC_LINE_LIMIT = 16 * 1024 * 1024
+CONNECT_TIMEOUT = 30  # seconds to wait for a freshly spawned worker to open its socket
+
+# everything the Discord process asks of the Codeforces side; the worker serves exactly these
+RPC_METHODS = ("check_handle", "unknown_tags", "select_problems", "select_batch", "problem_solves", "handle_solves",
+               "recent_status", "unavailable_reason", "api_stats", "warm_handles", "touch_handles")
+
+
+class WorkerError(CFError):
+    """The CF worker process failed the call or could not be reached."""
+
+
+class LocalBackend:
+    """Codeforces side in this process: cfapi scheduler, caches and the problem catalog."""
+
+    async def start(self):
+        # one pooled CF API session for the whole bot lifetime
+        await cfapi.start()
+        # problemset served from a local snapshot, refreshed in the background
+        problemset.store.start()
+        # keeps registered handles' solved sets fresh with spare rate-limit capacity
+        warmer.start()
+
+    async def close(self):
+        await warmer.stop()
+        await problemset.store.stop()
+        await cfapi.close()
+
+    async def check_handle(self, handle):
+        """Raises CFHandleNotFound / other CFError subclasses if the handle can't be validated."""
+        solved = await fetch_submissions(handle, raise_errors=True)
+        return len(solved)
+
+    async def unknown_tags(self, tags):
+        catalog = await problemset.store.get_catalog()
+        return catalog.unknown_tags(tags) if catalog else []
+
+    async def _solved_sets(self, handles, max_age):
+        solved = []
+        for handle in handles:
+            s = await fetch_submissions(handle, max_age=max_age)
+            if s is None:
+                return None
+            solved.append(s)
+        return solved
+
+    async def select_problems(self, handles, ratings_list, filters=None, max_age=0):
+        """Problems (CF dicts) unsolved by every handle, or None if a fetch failed / not enough problems."""
+        solved = await self._solved_sets(handles, max_age)
+        catalog = await problemset.store.get_catalog()
+        if solved is None or catalog is None:
+            return None
+        return catalog.select(ratings_list, solved, **(filters or {}))
+
+    async def select_batch(self, handles, groups, ratings_list, filters=None, max_age=0):
+        """
+        Disjoint problem sets for many duels (tournaments): each handle is fetched once, then
+        catalog.select_many picks a set per group of handle indices. None if a fetch failed.
+        """
+        solved = await self._solved_sets(handles, max_age)
+        catalog = await problemset.store.get_catalog()
+        if solved is None or catalog is None:
+            return None
+        return catalog.select_many(ratings_list, solved, groups, **(filters or {}))
+
+    async def problem_solves(self, handle, pids, priority=PRIORITY_INTERACTIVE):
+        """{pid: first AC time} for a duel's open problems: one CF request per handle (cfapi.fetch_solves)."""
+        return await fetch_solves(handle, pids, priority)
+
+    async def handle_solves(self, handle, pids, max_age=0, priority=PRIORITY_BACKGROUND):
+        """{pid: first AC time} for `pids` from the handle's (cached) full solved set; None on error."""
+        solved = await fetch_submissions(handle, max_age=max_age, priority=priority)
+        if solved is None:
+            return None
+        return {pid: solved[pid] for pid in pids if pid in solved}
+
+    async def recent_status(self, priority=PRIORITY_BACKGROUND):
+        return await fetch_recent_status(priority=priority)
+
+    async def warm_handles(self, handles):
+        """Replace the set of handles the cache warmer keeps fresh (all registered handles)."""
+        warmer.set_handles(handles)
+
+    async def touch_handles(self, handles):
+        """Mark handles as just used: refreshed more often and ahead of idle ones."""
+        warmer.touch(handles)
+
+    async def unavailable_reason(self):
+        return cfapi.unavailable_reason()
+
+    async def api_stats(self):
+        return cfapi.scheduler.stats()
+
+
+def _encode(method, result):
+    if method == "recent_status" and result is not None:
+        return {"accepted": result.accepted, "count": result.count,
+                "oldest_time": result.oldest_time, "newest_id": result.newest_id}
+    return result
+
+
+def _decode(method, result):
+    if method == "recent_status" and result is not None:
+        page = RecentPage()
+        page.accepted = [tuple(a) for a in result["accepted"]]
+        page.count = result["count"]
+        page.oldest_time = result["oldest_time"]
+        page.newest_id = result["newest_id"]
+        return page
+    if method == "api_stats":
+        for k in ("queue_by_priority", "avg_wait"):
+            result[k] = {int(p): v for p, v in result[k].items()}
+    return result
+
+
+def _error_type(name):
+    cls = getattr(cfapi, name, None)
+    return cls if isinstance(cls, type) and issubclass(cls, CFError) else WorkerError
+
+
+class RemoteBackend:
+    """
+    Same calls as LocalBackend, forwarded to the CF worker over a Unix socket (one JSON object per line).
+    Requests are pipelined on one connection and matched to replies by id; CF errors come back as the
+    same CFError subclasses, and a lost worker fails pending calls with WorkerError.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._reader = None
+        self._writer = None
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._read_task = None
+        self._connect_lock = asyncio.Lock()
+
+    async def start(self, timeout=CONNECT_TIMEOUT):
+        loop = asyncio.get_running_loop()
+        give_up = loop.time() + timeout
+        while True:
+            try:
+                await self._connect()
+                return
+            except OSError:
+                if loop.time() >= give_up:
+                    raise
+                await asyncio.sleep(0.2)
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_unix_connection(self.path, limit=RPC_LINE_LIMIT)
+        self._read_task = asyncio.get_running_loop().create_task(self._read_loop())
+
+    async def _read_loop(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                msg = json.loads(line)
+                fut = self._pending.pop(msg["id"], None)
+                if fut is None or fut.done():
+                    continue
+                if "error" in msg:
+                    fut.set_exception(_error_type(msg["error"])(msg.get("message", "")))
+                else:
+                    fut.set_result(msg.get("result"))
+        except Exception as e:
+            print("❌ Lost connection to CF worker:", e)
+        finally:
+            self._writer = None
+            pending, self._pending = self._pending, {}
+            for fut in pending.values():
+                if not fut.done():
+                    fut.set_exception(WorkerError("CF worker connection closed"))
+
+    async def _call(self, method, *args):
+        if self._writer is None:
+            async with self._connect_lock:
+                if self._writer is None:
+                    try:
+                        await self._connect()
+                    except OSError as e:
+                        raise WorkerError(f"CF worker unreachable: {e}") from e
+        req_id = next(self._ids)
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[req_id] = fut
+        self._writer.write((json.dumps({"id": req_id, "method": method, "args": args}) + "\n").encode())
+        await self._writer.drain()
+        return _decode(method, await fut)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._read_task is not None:
+            self._read_task.cancel()
+
+    def __getattr__(self, name):
+        if name not in RPC_METHODS:
+            raise AttributeError(name)
+        return lambda *args: self._call(name, *args)
+
+
+class BackendProxy:
+    """Module-level handle the bot code calls; bot.py decides at startup which backend sits behind it."""
+
+    def __init__(self, impl):
+        self.impl = impl
+
+    def use(self, impl):
+        self.impl = impl
+
+    def __getattr__(self, name):
+        return getattr(self.impl, name)
+
+
+backend = BackendProxy(LocalBackend())
+
+
+async def serve(reader, writer, impl):
+    """Answer one client's RPC lines with `impl` (worker side). Calls run concurrently; replies may reorder."""
+    write_lock = asyncio.Lock()
+    tasks = set()
+
+    async def answer(msg):
+        method = msg.get("method")
+        try:
+            if method not in RPC_METHODS:
+                raise WorkerError(f"unknown method {method!r}")
+            result = _encode(method, await getattr(impl, method)(*msg.get("args", ())))
+            reply = {"id": msg["id"], "result": result}
+        except Exception as e:
+            name = type(e).__name__ if isinstance(e, CFError) else "WorkerError"
+            reply = {"id": msg["id"], "error": name, "message": str(e)}
+        async with write_lock:
+            writer.write((json.dumps(reply) + "\n").encode())
+            await writer.drain()
+
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            task = asyncio.get_running_loop().create_task(answer(json.loads(line)))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        writer.close()
@@ -0,0 +1,151 @@
+# bench_decode.py
+"""
+Compare whole-body vs streaming decoding of a user.status response.
+
+    python3 bench_decode.py [recorded_user_status.json]
+
+Record a real response with e.g.
+    curl -s "https://codeforces.com/api/user.status?handle=tourist" > status.json
+Without an argument a synthetic response of the same shape is generated.
+"""
+import codecs
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from cfapi import ResultStream, SolvedDecoder, SolvedPage, STREAM_CHUNK_SIZE
+
+SYNTHETIC_SUBMISSIONS = 20000
+
+
+def make_synthetic(path, n=SYNTHETIC_SUBMISSIONS):
+    rnd = random.Random(1)
+    verdicts = ["OK", "WRONG_ANSWER", "TIME_LIMIT_EXCEEDED", "OK", "RUNTIME_ERROR"]
+    with open(path, "w") as f:
+        f.write('{"status":"OK","result":[')
+        for i in range(n):
+            cid = rnd.randint(1, 2000)
+            sub = {
+                "id": 300000000 - i,
+                "contestId": cid,
+                "creationTimeSeconds": 1700000000 - i * 600,
+                "relativeTimeSeconds": 2147483647,
+                "problem": {
+                    "contestId": cid,
+                    "index": rnd.choice("ABCDEF"),
+                    "name": "Some Problem Name " + str(i),
+                    "type": "PROGRAMMING",
+                    "points": 1000.0,
+                    "rating": rnd.choice(range(800, 3600, 100)),
+                    "tags": rnd.sample(["dp", "greedy", "math", "graphs", "strings", "implementation",
+                                        "brute force", "sortings", "data structures"], 3),
+                },
+                "author": {
+                    "contestId": cid,
+                    "members": [{"handle": "someone"}],
+                    "participantType": "PRACTICE",
+                    "ghost": False,
+                    "startTimeSeconds": 1600000000,
+                },
+                "programmingLanguage": "GNU C++20 (64)",
+                "verdict": rnd.choice(verdicts),
+                "testset": "TESTS",
+                "passedTestCount": 42,
+                "timeConsumedMillis": 46,
+                "memoryConsumedBytes": 102400,
+            }
+            if i:
+                f.write(",")
+            json.dump(sub, f, separators=(",", ":"))
+        f.write("]}")
+
+
+def decode_whole(path):
+    # what resp.json() does: read the full body, build every dict, then fold
+    with open(path, "rb") as f:
+        data = json.loads(f.read())
+    solved = {}
+    for sub in data.get("result", []):
+        if sub.get("verdict") != "OK":
+            continue
+        prob = sub.get("problem", {})
+        pid = f"{prob.get('contestId')}-{prob.get('index')}"
+        t = sub.get("creationTimeSeconds", 0)
+        if pid not in solved or (t and t < solved[pid]):
+            solved[pid] = t
+    return solved
+
+
+def decode_streaming(path):
+    decoder = SolvedDecoder()
+    page = SolvedPage()
+    stream = ResultStream()
+    text = codecs.getincrementaldecoder("utf-8")()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            decoder.feed(page, stream.feed(text.decode(chunk)))
+    decoder.feed(page, stream.feed(text.decode(b"", final=True)))
+    decoder.finish(stream)
+    return page.solved
+
+
+def measure(fn, path, runs=3):
+    best = None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn(path)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    tracemalloc.start()
+    result = fn(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def child_rss(mode, path):
+    # peak RSS (VmHWM, Linux) of a fresh interpreter that only runs one decoder
+    out = subprocess.run([sys.executable, __file__, "--child", mode, path],
+                         capture_output=True, text=True, check=True)
+    return int(out.stdout.strip()) * 1024
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        {"whole": decode_whole, "streaming": decode_streaming}[sys.argv[2]](sys.argv[3])
+        with open("/proc/self/status") as f:
+            print(next(line.split()[1] for line in f if line.startswith("VmHWM:")))
+        return
+    if len(sys.argv) > 1:
+        path = sys.argv[1]
+        cleanup = False
+    else:
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        make_synthetic(path)
+        cleanup = True
+    try:
+        size = os.path.getsize(path)
+        print(f"response: {path} ({size / 1e6:.1f} MB)")
+        r1, t1, m1 = measure(decode_whole, path)
+        r2, t2, m2 = measure(decode_streaming, path)
+        assert r1 == r2, "decoders disagree"
+        rss1 = child_rss("whole", path)
+        rss2 = child_rss("streaming", path)
+        print(f"whole-body  : {t1 * 1000:7.1f} ms  heap peak {m1 / 1e6:6.1f} MB  RSS peak {rss1 / 1e6:6.1f} MB  ({len(r1)} solved)")
+        print(f"streaming   : {t2 * 1000:7.1f} ms  heap peak {m2 / 1e6:6.1f} MB  RSS peak {rss2 / 1e6:6.1f} MB  ({len(r2)} solved)")
+    finally:
+        if cleanup:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,29 @@ from discord.ext import commands
 ## from config import BOT_TOKEN
 import cflink
 import duel
+import history
+import ladder
+import tournament
+import worker
+from backend import backend, RemoteBackend
+from journal import journal
+from deadlines import deadlines
+from outbox import outbox
 
+import asyncio
 import os
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
+# "" = Codeforces work in this process; "spawn" = start worker.py as a child and talk to it over a Unix socket;
+# "connect" = use an already running worker (e.g. one shared by several shard processes)
+CF_WORKER = os.getenv("CF_WORKER", "")
+SHARDED = os.getenv("BOT_SHARDED", "").strip().lower() in {"1", "true", "yes"}
 
 intents = discord.Intents.default()
 intents.message_content = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot_class = commands.AutoShardedBot if SHARDED else commands.Bot
+bot = bot_class(command_prefix="!", intents=intents)
 
 @bot.event
 async def on_ready():
@@ -20,6 +34,42 @@ async def on_ready():
 # Register all modular command sets
 cflink.setup(bot)
 duel.setup(bot)
+ladder.setup(bot)
+tournament.setup(bot)
+
+async def main():
+    worker_proc = None
+    if CF_WORKER:
+        if CF_WORKER == "spawn":
+            worker_proc = await worker.spawn()
+        backend.use(RemoteBackend(worker.SOCKET_PATH))
+    # CF API session, caches and problemset (here, or connect to the worker that owns them)
+    await backend.start()
+    # pre-warm solved sets of every registered handle in the background
+    await backend.warm_handles(cflink.all_handles())
+    # finished duels: SQLite history + in-memory buffer for !recent
+    await history.store.open()
+    # Elo ladders live in the same database
+    await ladder.ladders.load()
+    # active duels survive restarts through the session journal
+    duel.restore_sessions()
+    try:
+        async with bot:
+            await bot.start(BOT_TOKEN)
+    finally:
+        await deadlines.stop()
+        await cflink.registry.stop()
+        await outbox.stop()
+        await journal.stop()
+        await history.store.close()
+        await backend.close()
+        if worker_proc is not None:
+            worker_proc.terminate()
+            await worker_proc.wait()
 
 # Start the bot
-bot.run(BOT_TOKEN)
\ No newline at end of file
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
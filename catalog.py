@@ -0,0 +1,164 @@
+# catalog.py
+import random
+import numpy as np
+from solved import SolvedSet, pid_table
+
+BAD_TAGS = {"output-only", "*special problem", "challenge", "expression parsing", "*special"}
+EXCLUDED_CONTEST_IDS = {952}
+
+# nearby ratings tried (in order) when a target rating has no usable problem
+FALLBACK_OFFSETS = [100, -100, 200, -200, 300, -300, 400, -400, 500, -500]
+
+
+class ProblemCatalog:
+    """
+    Columnar, pre-filtered view of problemset.problems built once per problemset load.
+    Problems with BAD_TAGS, EXCLUDED_CONTEST_IDS or no rating are dropped up front; the rest are
+    stored as parallel NumPy arrays (rating, contestId, tag bitmask) plus per-rating row buckets,
+    so problem selection is a handful of boolean mask operations instead of rescanning dicts.
+    """
+
+    def __init__(self, problems):
+        kept = []
+        for p in problems:
+            if p.get("rating") is None or p.get("contestId") is None:
+                continue
+            if p["contestId"] in EXCLUDED_CONTEST_IDS:
+                continue
+            if BAD_TAGS.intersection(p.get("tags", [])):
+                continue
+            kept.append(p)
+
+        self.problems = kept
+        self.pids = [f"{p['contestId']}-{p['index']}" for p in kept]
+        self.pid_index = {pid: row for row, pid in enumerate(self.pids)}
+        # global interned id of each row, for bitset lookups
+        self.gid = np.fromiter((pid_table.intern(pid) for pid in self.pids), dtype=np.int64, count=len(self.pids))
+
+        # intern tags -> bit positions
+        self.tag_bit = {}
+        for p in kept:
+            for tag in p.get("tags", []):
+                if tag not in self.tag_bit:
+                    self.tag_bit[tag] = len(self.tag_bit)
+        if len(self.tag_bit) > 64:
+            raise ValueError(f"too many distinct tags for a 64-bit mask: {len(self.tag_bit)}")
+
+        n = len(kept)
+        self.rating = np.fromiter((p["rating"] for p in kept), dtype=np.int32, count=n)
+        self.contest_id = np.fromiter((p["contestId"] for p in kept), dtype=np.int32, count=n)
+        self.tag_mask = np.fromiter((self._bits(p.get("tags", [])) for p in kept), dtype=np.uint64, count=n)
+
+        order = np.argsort(self.rating, kind="stable")
+        ratings, starts = np.unique(self.rating[order], return_index=True)
+        bounds = list(starts[1:]) + [n]
+        self.buckets = {int(r): order[s:e] for r, s, e in zip(ratings, starts, bounds)}
+
+    def __len__(self):
+        return len(self.problems)
+
+    def _bits(self, tags) -> int:
+        bits = 0
+        for tag in tags:
+            bits |= 1 << self.tag_bit[tag]
+        return bits
+
+    def unknown_tags(self, tags):
+        return [t for t in tags if t not in self.tag_bit]
+
+    def filter_mask(self, required_tags=(), forbidden_tags=(), contest_range=None):
+        """Rows allowed by the optional !duel filters (unknown tags never match)."""
+        mask = np.ones(len(self.problems), dtype=bool)
+        if required_tags:
+            if self.unknown_tags(required_tags):
+                return np.zeros(len(self.problems), dtype=bool)
+            need = np.uint64(self._bits(required_tags))
+            mask &= (self.tag_mask & need) == need
+        known_forbidden = [t for t in forbidden_tags if t in self.tag_bit]
+        if known_forbidden:
+            mask &= (self.tag_mask & np.uint64(self._bits(known_forbidden))) == 0
+        if contest_range is not None:
+            lo, hi = contest_range
+            mask &= (self.contest_id >= lo) & (self.contest_id <= hi)
+        return mask
+
+    def solved_mask(self, *solved_maps):
+        """
+        Rows solved by any of the given maps. SolvedSets are OR-ed together as bitsets and
+        projected onto the catalog in one gather; plain {pid: ...} dicts go through pid_index.
+        """
+        mask = np.zeros(len(self.problems), dtype=bool)
+        bitsets = [s.bits for s in solved_maps if isinstance(s, SolvedSet)]
+        if bitsets:
+            width = max(len(b) for b in bitsets)
+            combined = np.zeros(width, dtype=np.uint8)
+            for b in bitsets:
+                combined[:len(b)] |= np.frombuffer(bytes(b), dtype=np.uint8)
+            solved_ids = np.unpackbits(combined, bitorder="little")
+            inside = self.gid < len(solved_ids)
+            mask[inside] = solved_ids[self.gid[inside]].astype(bool)
+        index = self.pid_index
+        for solved in solved_maps:
+            if isinstance(solved, SolvedSet):
+                continue
+            rows = [index[pid] for pid in solved if pid in index]
+            if rows:
+                mask[np.fromiter(rows, dtype=np.intp, count=len(rows))] = True
+        return mask
+
+    def pick(self, rating, available, rng=random):
+        """Random available row with exactly this rating, or None."""
+        rows = self.buckets.get(rating)
+        if rows is None:
+            return None
+        cand = rows[available[rows]]
+        if not len(cand):
+            return None
+        return int(cand[rng.randrange(len(cand))])
+
+    def _pick_set(self, ratings_list, available, rng):
+        """Rows for one problem set (clearing them in `available`), or None."""
+        rows = []
+        for r in ratings_list:
+            row = self.pick(r, available, rng)
+            if row is None:
+                for offset in FALLBACK_OFFSETS:
+                    row = self.pick(r + offset, available, rng)
+                    if row is not None:
+                        break
+            if row is None:
+                return None
+            available[row] = False
+            rows.append(row)
+        return rows
+
+    def select(self, ratings_list, solved_maps, required_tags=(), forbidden_tags=(), contest_range=None, rng=random):
+        """
+        One problem per target rating, unsolved in every solved map and pairwise distinct.
+        Falls back to nearby ratings (FALLBACK_OFFSETS). Returns the problem dicts or None.
+        """
+        available = self.filter_mask(required_tags, forbidden_tags, contest_range)
+        available &= ~self.solved_mask(*solved_maps)
+        rows = self._pick_set(ratings_list, available, rng)
+        return None if rows is None else [self.problems[row] for row in rows]
+
+    def select_many(self, ratings_list, solved_maps, groups, required_tags=(), forbidden_tags=(), contest_range=None, rng=random):
+        """
+        Problem sets for many duels in one pass: `solved_maps` holds one map per participant and `groups`
+        the participant indices of each duel. Each participant's solved set is projected onto the catalog
+        once, and no problem is used by two duels. Returns one problem list (or None) per group.
+        """
+        base = self.filter_mask(required_tags, forbidden_tags, contest_range)
+        solved = [self.solved_mask(s) for s in solved_maps]
+        out = []
+        for group in groups:
+            available = base.copy()
+            for i in group:
+                available &= ~solved[i]
+            rows = self._pick_set(ratings_list, available, rng)
+            if rows is None:
+                out.append(None)
+                continue
+            base[rows] = False
+            out.append([self.problems[row] for row in rows])
+        return out
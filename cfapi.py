@@ -1,74 +1,818 @@
 # cfapi.py
 import aiohttp
 import asyncio
+import codecs
+import heapq
+import itertools
+import json
+import random
+import re
 import time
+from collections import OrderedDict
+from solved import SolvedSet
 
-# Minimal global rate limiter: ensure at least MIN_INTERVAL seconds between any two CF API requests.
+API_BASE = "https://codeforces.com/api/"
+
+# Global rate limit: at least MIN_INTERVAL seconds between any two CF API requests.
 MIN_INTERVAL = 2.0  # seconds (Codeforces guideline ~1 call per 2 seconds)
 
-_rate_lock = asyncio.Lock()
-_last_call = 0.0
+# Request priorities (lower runs first)
+PRIORITY_INTERACTIVE = 0   # a user is waiting on a command
+PRIORITY_FINALIZE = 1      # duel timer / final scoring
+PRIORITY_BACKGROUND = 2    # polling, cache warm-up
+
+# Retry / backoff on transient failures (rate limit, 5xx, timeouts)
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0        # seconds, doubled per attempt, jittered x0.5..1.5
+BACKOFF_CAP = 30.0
+# Adaptive spacing: widened on "Call limit exceeded", decays back toward MIN_INTERVAL on success
+MAX_INTERVAL = 10.0
+INTERVAL_WIDEN = 1.5
+INTERVAL_DECAY = 0.95
+# Circuit breaker: after this many consecutive outage failures stop calling CF for a while
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0   # seconds, doubled each time a probe fails
+BREAKER_MAX_COOLDOWN = 300.0
+
+# Default seconds a caller waits for its request before giving up (None = no deadline)
+DEFAULT_DEADLINES = {
+    PRIORITY_INTERACTIVE: 60,
+    PRIORITY_FINALIZE: 300,
+    PRIORITY_BACKGROUND: None,
+}
+
+# Connection pool tuning (one pool shared by every CF call)
+POOL_LIMIT = 4            # max open sockets to codeforces.com
+DNS_CACHE_TTL = 300       # seconds
+KEEPALIVE_TIMEOUT = 60    # seconds an idle socket is kept open (must exceed MIN_INTERVAL)
+REQUEST_TIMEOUT = 30      # total seconds per request (problemset.problems is several MB)
+CONNECT_TIMEOUT = 10
+STREAM_CHUNK_SIZE = 64 * 1024  # bytes read per step when stream-decoding large responses
+
+class CFError(Exception):
+    """Base class for Codeforces API failures."""
+
+
+class CFRateLimited(CFError):
+    """Codeforces answered "Call limit exceeded"."""
+
+
+class CFUnavailable(CFError):
+    """5xx, timeout or network failure; usually transient."""
+
+
+class CFMaintenance(CFError):
+    """Codeforces is serving its maintenance / temporarily unavailable page."""
+
+
+class CFHandleNotFound(CFError):
+    """The requested handle does not exist."""
+
+
+class CFCircuitOpen(CFError):
+    """Codeforces looks down; the call was rejected without hitting the API."""
+
+
+class DeadlineExceeded(CFError):
+    """The request was not served before the caller's deadline."""
+
+
+def _classify_failure(http_status: int, comment: str) -> CFError:
+    text = comment or ""
+    low = text.lower()
+    if "call limit exceeded" in low:
+        return CFRateLimited(text)
+    if "not found" in low and "handle" in low:
+        return CFHandleNotFound(text)
+    if "maintenance" in low or "temporarily unavailable" in low:
+        return CFMaintenance(text)
+    if http_status >= 500:
+        return CFUnavailable(f"HTTP {http_status}: {text}")
+    return CFError(f"HTTP {http_status}: {text}")
+
+
+class CFClient:
+    """
+    Long-lived HTTP client for the Codeforces API.
+    Holds one aiohttp session (keep-alive connection pool + DNS cache) for the lifetime of the bot,
+    so consecutive calls reuse the same TCP/TLS connection instead of handshaking every time.
+    """
+
+    def __init__(self, limit=POOL_LIMIT, dns_ttl=DNS_CACHE_TTL, keepalive=KEEPALIVE_TIMEOUT,
+                 total_timeout=REQUEST_TIMEOUT, connect_timeout=CONNECT_TIMEOUT):
+        self.limit = limit
+        self.dns_ttl = dns_ttl
+        self.keepalive = keepalive
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout)
+        self._session = None
+
+    async def start(self):
+        """Open the shared session (idempotent). Must be called from the running event loop."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={"Accept": "application/json"},
+            )
+        return self
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            raise RuntimeError("CFClient is not started; call `await client.start()` first")
+        return self._session
+
+    async def get_json(self, method: str, params: dict | None = None, decode=None):
+        """
+        GET API_BASE + method and return the `result` of an OK response.
+        If `decode` is given, a 200 response is handed to `await decode(resp)` instead of being
+        loaded whole, and its return value is the result.
+        Every failure is raised as a CFError subclass (see _classify_failure).
+        """
+        if self._session is None or self._session.closed:
+            # lazily open if the bot forgot to (e.g. ad-hoc scripts)
+            await self.start()
+        try:
+            async with self.session.get(API_BASE + method, params=params) as resp:
+                if resp.content_type != "application/json":
+                    # CF serves an HTML page while it is down for maintenance
+                    text = await resp.text(errors="replace")
+                    if resp.status >= 500 and "maintenance" not in text.lower():
+                        raise CFUnavailable(f"HTTP {resp.status}")
+                    raise CFMaintenance(f"HTTP {resp.status}, non-JSON response")
+                if decode is not None and resp.status == 200:
+                    return await decode(resp)
+                data = await resp.json()
+                status = resp.status
+        except CFError:
+            raise
+        except (asyncio.TimeoutError, aiohttp.ClientError, ValueError) as e:
+            raise CFUnavailable(f"{type(e).__name__}: {e}") from e
+        if data.get("status") != "OK":
+            raise _classify_failure(status, data.get("comment", ""))
+        return data.get("result")
+
+
+class CircuitBreaker:
+    """
+    Consecutive outage failures (5xx, timeouts, maintenance) open the breaker; while open every call
+    fails fast with CFCircuitOpen. After the cooldown one probe call is let through (half-open):
+    success closes the breaker, failure re-opens it with a doubled cooldown.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN, max_cooldown=BREAKER_MAX_COOLDOWN):
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._probe_at = None   # when the current half-open probe was let through
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    @property
+    def is_open(self) -> bool:
+        return self.state != "closed"
+
+    def check(self):
+        """Raise CFCircuitOpen unless a call may go out now."""
+        state = self.state
+        if state == "closed":
+            return
+        now = time.monotonic()
+        # one probe per cooldown window (a probe that never completes does not wedge the breaker)
+        if state == "half-open" and (self._probe_at is None or now - self._probe_at >= self.cooldown):
+            self._probe_at = now
+            return
+        retry_in = max(0.0, self.cooldown - (now - self.opened_at))
+        raise CFCircuitOpen(f"Codeforces API unavailable, retry in {retry_in:.0f}s")
+
+    def record_success(self):
+        if self.opened_at is not None:
+            print("✅ Codeforces circuit closed")
+        self.failures = 0
+        self.opened_at = None
+        self._probe_at = None
+        self.cooldown = self.base_cooldown
+
+    def record_failure(self):
+        self.failures += 1
+        if self.opened_at is not None:
+            if self._probe_at is not None:
+                # failed probe: back off harder
+                self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+                self.opened_at = time.monotonic()
+                self._probe_at = None
+        elif self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+            print(f"⚠️ Codeforces circuit opened after {self.failures} consecutive failures")
+
+
+_RESULT_RE = re.compile(r'"result"\s*:\s*\[')
+_WS_COMMA = " \t\r\n,"
+
+
+class ResultStream:
+    """
+    Incremental parser for `{"status": ..., "result": [ {...}, {...}, ... ]}` documents.
+    Text is fed chunk by chunk; each complete element of the result array is returned as soon
+    as it has been received, so only one element (plus one partial chunk) is held at a time.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._head = None     # text before the result array
+        self._tail = ""       # text after it
+        self.done = False
+
+    def feed(self, text: str) -> list:
+        if self.done:
+            self._tail += text
+            return []
+        buf = self._buf + text
+        if self._head is None:
+            m = _RESULT_RE.search(buf)
+            if m is None:
+                self._buf = buf
+                return []
+            self._head = buf[:m.start()]
+            buf = buf[m.end():]
+        items = []
+        pos, n = 0, len(buf)
+        while True:
+            while pos < n and buf[pos] in _WS_COMMA:
+                pos += 1
+            if pos >= n:
+                break
+            if buf[pos] == "]":
+                self.done = True
+                self._tail = buf[pos + 1:]
+                pos = n
+                break
+            try:
+                obj, pos = self._decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break  # element continues in the next chunk
+            items.append(obj)
+        self._buf = buf[pos:]
+        return items
+
+    def envelope(self) -> dict:
+        """The document with the result array left out; call after the last chunk."""
+        if self._head is None:
+            # no result array at all (e.g. status FAILED)
+            return json.loads(self._buf)
+        if not self.done:
+            raise ValueError("truncated response: result array not closed")
+        return json.loads(self._head + '"result":null' + self._tail)
+
+
+# verdicts of submissions still in the queue or being judged (no verdict at all also means queued)
+PENDING_VERDICTS = frozenset((None, "TESTING", "SUBMITTED"))
+
+
+def seen_through(newest: int, pending: int) -> int:
+    """Highest submission id that may be marked as merged: everything below the oldest one still judging."""
+    return min(newest, pending - 1) if pending else newest
+
+
+class SolvedPage:
+    __slots__ = ("solved", "newest", "pending", "count", "fresh")
+
+    def __init__(self):
+        self.solved = {}   # pid -> earliest AC time among fresh submissions
+        self.newest = 0    # highest submission id in the response
+        self.pending = 0   # lowest fresh submission id without a final verdict (0 = none)
+        self.count = 0     # submissions in the response
+        self.fresh = 0     # submissions with id > min_id
+
+
+class SolvedDecoder:
+    """
+    Streaming decoder for user.status: folds submissions newer than `min_id` straight into a
+    solved map without materialising the whole response.
+    """
+
+    def __init__(self, min_id: int = 0):
+        self.min_id = min_id
+        self.key = ("solved", min_id)
+
+    def feed(self, page: SolvedPage, items):
+        min_id = self.min_id
+        for sub in items:
+            page.count += 1
+            sid = sub.get("id", 0)
+            if sid > page.newest:
+                page.newest = sid
+            if sid <= min_id:
+                continue
+            page.fresh += 1
+            verdict = sub.get("verdict")
+            if verdict in PENDING_VERDICTS:
+                # not final yet: must be read again once judged
+                if not page.pending or sid < page.pending:
+                    page.pending = sid
+                continue
+            if verdict != "OK":
+                continue
+            prob = sub.get("problem", {})
+            pid = f"{prob.get('contestId')}-{prob.get('index')}"
+            t = sub.get("creationTimeSeconds", 0)
+            # keep earliest accepted time (first AC)
+            if pid not in page.solved or (t and t < page.solved[pid]):
+                page.solved[pid] = t
+
+    def finish(self, stream: ResultStream):
+        env = stream.envelope()
+        if env.get("status") != "OK":
+            raise _classify_failure(200, env.get("comment", ""))
+
+    def new_page(self):
+        return SolvedPage()
+
+    async def __call__(self, resp):
+        page = self.new_page()
+        stream = ResultStream()
+        text = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+            self.feed(page, stream.feed(text.decode(chunk)))
+        self.feed(page, stream.feed(text.decode(b"", final=True)))
+        self.finish(stream)
+        return page
+
+
+class RecentPage:
+    __slots__ = ("accepted", "count", "oldest_time", "newest_id")
+
+    def __init__(self):
+        self.accepted = []      # (lowercase handle, pid, creationTimeSeconds) for every AC in the feed
+        self.count = 0          # submissions in the feed
+        self.oldest_time = None  # creation time of the oldest submission in the feed
+        self.newest_id = 0
+
+
+class RecentDecoder(SolvedDecoder):
+    """Streaming decoder for problemset.recentStatus keeping only accepted (handle, pid, time) triples."""
+
+    def __init__(self):
+        super().__init__()
+        self.key = ("recent",)
 
-async def _wait_rate_slot():
-    """Ensure spacing of MIN_INTERVAL between CF API calls."""
-    global _last_call
-    async with _rate_lock:
-        now = time.time()
-        wait = MIN_INTERVAL - (now - _last_call)
-        if wait > 0:
-            await asyncio.sleep(wait)
-        _last_call = time.time()
+    def feed(self, page: RecentPage, items):
+        for sub in items:
+            page.count += 1
+            t = sub.get("creationTimeSeconds", 0)
+            if page.oldest_time is None or t < page.oldest_time:
+                page.oldest_time = t
+            sid = sub.get("id", 0)
+            if sid > page.newest_id:
+                page.newest_id = sid
+            if sub.get("verdict") != "OK":
+                continue
+            prob = sub.get("problem", {})
+            pid = f"{prob.get('contestId')}-{prob.get('index')}"
+            for member in sub.get("author", {}).get("members", []):
+                handle = member.get("handle")
+                if handle:
+                    page.accepted.append((handle.lower(), pid, t))
 
-async def fetch_submissions(handle: str):
+    def new_page(self):
+        return RecentPage()
+
+
+# Shared client used by every fetch function; opened/closed by bot.py.
+client = CFClient()
+
+
+class _Request:
+    __slots__ = ("key", "method", "params", "decode", "priority", "deadline", "future", "enqueued_at", "started", "waiters")
+
+    def __init__(self, key, method, params, decode, priority, deadline):
+        self.key = key
+        self.method = method
+        self.params = params
+        self.decode = decode
+        self.priority = priority
+        self.deadline = deadline      # monotonic time after which nobody wants the result (None = never)
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+        self.started = False
+        self.waiters = 1
+
+
+class RequestScheduler:
+    """
+    Replaces the old FIFO rate lock. Pending CF calls sit in a priority heap and one dispatcher
+    task releases them at most once per `interval` seconds, highest priority first.
+    Identical concurrent requests (same method + params) are coalesced into one HTTP call
+    whose result is handed to every waiter.
+    The spacing adapts: each "Call limit exceeded" widens it, successes shrink it back to MIN_INTERVAL.
+    """
+
+    def __init__(self, interval=MIN_INTERVAL, breaker=None):
+        self.interval = interval
+        self.breaker = breaker or CircuitBreaker()
+        self._heap = []              # (priority, seq, _Request); stale entries are skipped on pop
+        self._pending = {}           # key -> _Request (queued or in flight)
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._task = None
+        self._last_call = 0.0
+        # stats
+        self.sent = 0
+        self.coalesced = 0
+        self.expired = 0
+        self.max_wait = 0.0
+        self._avg_wait = {p: 0.0 for p in DEFAULT_DEADLINES}
+
+    @staticmethod
+    def _key(method, params, decode):
+        return (method, tuple(sorted((params or {}).items())), getattr(decode, "key", decode))
+
+    def _ensure_running(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, method: str, params: dict | None = None,
+                     priority: int = PRIORITY_INTERACTIVE, timeout: float | None = None, decode=None):
+        """
+        Queue a call and wait for its `result`.
+        Raises DeadlineExceeded if it is not served within `timeout` seconds,
+        CFCircuitOpen if Codeforces is considered down, other CFError subclasses from the call itself.
+        """
+        self._ensure_running()
+        key = self._key(method, params, decode)
+        if key not in self._pending:
+            self.breaker.check()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        req = self._pending.get(key)
+        if req is not None:
+            self.coalesced += 1
+            req.waiters += 1
+            # the shared request lives as long as its most patient waiter
+            if req.deadline is not None:
+                req.deadline = None if deadline is None else max(req.deadline, deadline)
+            if priority < req.priority and not req.started:
+                req.priority = priority
+                heapq.heappush(self._heap, (priority, next(self._seq), req))
+                self._wakeup.set()
+        else:
+            req = _Request(key, method, params, decode, priority, deadline)
+            req.future.add_done_callback(_consume_exception)
+            self._pending[key] = req
+            heapq.heappush(self._heap, (priority, next(self._seq), req))
+            self._wakeup.set()
+        try:
+            if timeout is None:
+                return await asyncio.shield(req.future)
+            return await asyncio.wait_for(asyncio.shield(req.future), timeout)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"{method} not served within {timeout}s")
+
+    async def _run(self):
+        while True:
+            while not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            wait = self.interval - (time.monotonic() - self._last_call)
+            if wait > 0:
+                # requests arriving meanwhile still compete for this slot
+                await asyncio.sleep(wait)
+                continue
+            priority, _, req = heapq.heappop(self._heap)
+            if req.started or req.future.done() or priority != req.priority:
+                continue
+            now = time.monotonic()
+            if req.deadline is not None and now > req.deadline:
+                self.expired += 1
+                self._pending.pop(req.key, None)
+                req.future.set_exception(DeadlineExceeded(f"{req.method} expired in queue"))
+                continue
+            req.started = True
+            self._last_call = now
+            self._record_wait(priority, now - req.enqueued_at)
+            asyncio.create_task(self._execute(req))
+
+    async def _execute(self, req):
+        try:
+            self.sent += 1
+            result = await client.get_json(req.method, req.params, req.decode)
+            self.interval = max(MIN_INTERVAL, self.interval * INTERVAL_DECAY)
+            self.breaker.record_success()
+            if not req.future.done():
+                req.future.set_result(result)
+        except CFRateLimited as e:
+            # CF is up, we are just too fast
+            self.breaker.record_success()
+            self.interval = min(MAX_INTERVAL, self.interval * INTERVAL_WIDEN)
+            print(f"⚠️ Codeforces call limit hit, spacing widened to {self.interval:.1f}s")
+            if not req.future.done():
+                req.future.set_exception(e)
+        except (CFUnavailable, CFMaintenance) as e:
+            self.breaker.record_failure()
+            if not req.future.done():
+                req.future.set_exception(e)
+        except Exception as e:
+            # the API answered (bad handle etc.), so it is up
+            if isinstance(e, CFError):
+                self.breaker.record_success()
+            if not req.future.done():
+                req.future.set_exception(e)
+        finally:
+            if self._pending.get(req.key) is req:
+                del self._pending[req.key]
+
+    def _record_wait(self, priority, waited):
+        self.max_wait = max(self.max_wait, waited)
+        prev = self._avg_wait.get(priority, 0.0)
+        self._avg_wait[priority] = waited if prev == 0.0 else 0.8 * prev + 0.2 * waited
+
+    def queue_depth(self, priority: int | None = None) -> int:
+        return sum(1 for r in self._pending.values()
+                   if not r.started and (priority is None or r.priority == priority))
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth(),
+            "queue_by_priority": {p: self.queue_depth(p) for p in DEFAULT_DEADLINES},
+            "in_flight": sum(1 for r in self._pending.values() if r.started),
+            "avg_wait": dict(self._avg_wait),
+            "max_wait": self.max_wait,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "expired": self.expired,
+            "interval": self.interval,
+            "breaker": self.breaker.state,
+        }
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def _consume_exception(fut):
+    # avoid "exception was never retrieved" when every waiter already gave up
+    if not fut.cancelled():
+        fut.exception()
+
+
+scheduler = RequestScheduler()
+
+async def start():
+    await client.start()
+
+async def close():
+    await scheduler.stop()
+    await client.close()
+
+def _backoff_delay(attempt: int) -> float:
+    return min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)) * random.uniform(0.5, 1.5)
+
+async def _call(method: str, params: dict | None = None, priority: int = PRIORITY_INTERACTIVE, decode=None):
+    """
+    Scheduled API call returning the `result` of an OK response.
+    Rate limits and transient outages are retried with jittered exponential backoff;
+    everything else (bad handle, maintenance, open circuit, missed deadline) raises immediately.
+    """
+    timeout = DEFAULT_DEADLINES.get(priority)
+    for attempt in range(MAX_RETRIES):
+        try:
+            return await scheduler.submit(method, params, priority, timeout, decode)
+        except (CFRateLimited, CFUnavailable):
+            if attempt == MAX_RETRIES - 1:
+                raise
+            await asyncio.sleep(_backoff_delay(attempt))
+
+# --- Per-handle solved-set cache ---
+SUBMISSION_CACHE_SIZE = 2000   # handles kept (LRU)
+SUBMISSION_CACHE_TTL = 6 * 3600  # seconds before an entry is dropped and refetched in full (catches rejudges)
+STATUS_PAGE_SIZE = 100         # submissions per incremental user.status page
+MAX_INCREMENTAL_PAGES = 5      # more new submissions than this -> cheaper to refetch everything
+
+
+class _SolvedEntry:
+    __slots__ = ("solved", "last_id", "full_at", "checked_at")
+
+    def __init__(self, solved, last_id, now):
+        self.solved = solved        # SolvedSet: pid -> earliest AC time
+        self.last_id = last_id      # every submission up to this id has been merged with its final verdict
+        self.full_at = now          # time of the last full download
+        self.checked_at = now       # time of the last successful refresh
+
+
+class SubmissionCache:
+    """LRU + TTL map of lowercase handle -> _SolvedEntry."""
+
+    def __init__(self, maxsize=SUBMISSION_CACHE_SIZE, ttl=SUBMISSION_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def get(self, handle: str):
+        key = handle.lower()
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry.full_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def peek(self, handle: str):
+        """Entry without touching LRU order (None if missing or expired)."""
+        entry = self._entries.get(handle.lower())
+        if entry is None or time.time() - entry.full_at > self.ttl:
+            return None
+        return entry
+
+    def put(self, handle: str, entry: _SolvedEntry):
+        key = handle.lower()
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def discard(self, handle: str):
+        self._entries.pop(handle.lower(), None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+submission_cache = SubmissionCache()
+
+async def _refresh_incremental(handle: str, entry: _SolvedEntry, priority: int):
     """
-    Returns a dict mapping problem pid ("contestId-index") -> earliest accepted submission time (creationTimeSeconds)
+    Pull only the newest user.status pages (newest first) until we reach a submission
+    already merged into `entry`. Returns True when caught up, False if so many submissions are new
+    that a full refetch is cheaper. API errors propagate.
+    """
+    newest = entry.last_id
+    pending = 0
+    decoder = SolvedDecoder(min_id=entry.last_id)
+    for page_no in range(MAX_INCREMENTAL_PAGES):
+        page = await _call("user.status", {
+            "handle": handle,
+            "from": page_no * STATUS_PAGE_SIZE + 1,
+            "count": STATUS_PAGE_SIZE,
+        }, priority, decoder)
+        newest = max(newest, page.newest)
+        if page.pending and (not pending or page.pending < pending):
+            pending = page.pending
+        entry.solved.merge(page.solved)
+        if page.fresh < page.count or page.count < STATUS_PAGE_SIZE:
+            # submissions still judging stay above last_id so the next refresh reads them again
+            entry.last_id = seen_through(newest, pending)
+            entry.checked_at = time.time()
+            return True
+    return False
+
+async def fetch_submissions(handle: str, max_age: float = 0, priority: int = PRIORITY_INTERACTIVE,
+                            raise_errors: bool = False):
+    """
+    Returns a mapping (SolvedSet) of problem pid ("contestId-index") -> earliest accepted submission time
+    (creationTimeSeconds), or None on error (with raise_errors=True the CFError is raised instead, so callers can tell
+    a bad handle from an outage).
+    Served from the per-handle cache: the first call downloads the full history, later calls only fetch
+    submissions newer than the last one seen. If the entry was refreshed less than `max_age` seconds ago
+    no API call is made at all.
+    """
+    handle = handle.strip()
+    try:
+        entry = submission_cache.get(handle)
+        if entry is not None:
+            if max_age and time.time() - entry.checked_at <= max_age:
+                return entry.solved.copy()
+            if await _refresh_incremental(handle, entry, priority):
+                return entry.solved.copy()
+            submission_cache.discard(handle)
+
+        page = await _call("user.status", {"handle": handle}, priority, SolvedDecoder())
+        solved = SolvedSet.from_map(page.solved)
+        submission_cache.put(handle, _SolvedEntry(solved, seen_through(page.newest, page.pending), time.time()))
+        return solved.copy()
+    except CFError as e:
+        if raise_errors:
+            raise
+        print(f"⚠️ user.status failed for {handle}: {type(e).__name__}: {e}")
+        return None
+
+# --- Targeted duel verification via contest.status ---
+CONTEST_SOLVES_CACHE_SIZE = 5000   # (handle, contest) pairs kept (LRU)
+
+# (lowercase handle, contestId) -> {pid: first AC time} confirmed so far.
+# A first AC never moves, so confirmed pids are never re-queried.
+_contest_solves = OrderedDict()
+
+def _split_pid(pid: str):
+    cid, _, index = pid.partition("-")
+    return int(cid), index
+
+async def fetch_problem_solves(handle: str, pids, priority: int = PRIORITY_INTERACTIVE, raise_errors: bool = False):
+    """
+    Returns {pid: earliest accepted submission time} for the given pids only (unsolved pids are absent),
     or None on error.
+    Instead of the handle's whole user.status history this queries contest.status for just the contests
+    behind `pids`, filtered to `handle`. Contests whose requested pids are all already confirmed are skipped.
     """
     handle = handle.strip()
-    url = f"https://codeforces.com/api/user.status?handle={handle}"
-    for attempt in range(2):
-        try:
-            await _wait_rate_slot()
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as resp:
-                    if resp.status != 200:
-                        await asyncio.sleep(1)
-                        continue
-                    data = await resp.json()
-            if data.get("status") != "OK":
-                return None
-            solved = {}
-            for sub in data.get("result", []):
-                if sub.get("verdict") != "OK":
-                    continue
-                prob = sub.get("problem", {})
-                pid = f"{prob.get('contestId')}-{prob.get('index')}"
-                t = sub.get("creationTimeSeconds", 0)
-                # keep earliest accepted time (first AC)
-                if pid not in solved or (t and t < solved[pid]):
-                    solved[pid] = t
-            return solved
-        except Exception:
-            await asyncio.sleep(1)
-    return None
+    hkey = handle.lower()
+    by_contest = {}
+    for pid in pids:
+        by_contest.setdefault(_split_pid(pid)[0], []).append(pid)
 
-async def fetch_problemset():
+    result = {}
+    try:
+        for cid, cpids in by_contest.items():
+            ckey = (hkey, cid)
+            confirmed = _contest_solves.get(ckey)
+            if confirmed is None or any(p not in confirmed for p in cpids):
+                page = await _call("contest.status", {"contestId": cid, "handle": handle}, priority, SolvedDecoder())
+                confirmed = dict(confirmed or {})
+                for pid, t in page.solved.items():
+                    old = confirmed.get(pid)
+                    if old is None or (t and t < old):
+                        confirmed[pid] = t
+                _contest_solves[ckey] = confirmed
+            _contest_solves.move_to_end(ckey)
+            for pid in cpids:
+                if pid in confirmed:
+                    result[pid] = confirmed[pid]
+        while len(_contest_solves) > CONTEST_SOLVES_CACHE_SIZE:
+            _contest_solves.popitem(last=False)
+    except CFError as e:
+        if raise_errors:
+            raise
+        print(f"⚠️ contest.status failed for {handle}: {type(e).__name__}: {e}")
+        return None
+    return result
+
+async def fetch_solves(handle: str, pids, priority: int = PRIORITY_INTERACTIVE, raise_errors: bool = False):
+    """
+    {pid: earliest accepted time} for `pids` in one request per handle however many problems there are:
+    contest.status when they all come from a single contest, otherwise the handle's cached user.status
+    history (an incremental refresh is a single page). None on error.
+    """
+    if len({_split_pid(pid)[0] for pid in pids}) <= 1:
+        return await fetch_problem_solves(handle, pids, priority, raise_errors)
+    solved = await fetch_submissions(handle, priority=priority, raise_errors=raise_errors)
+    if solved is None:
+        return None
+    return {pid: solved[pid] for pid in pids if pid in solved}
+
+RECENT_STATUS_COUNT = 1000  # max allowed by problemset.recentStatus
+
+async def fetch_recent_status(count: int = RECENT_STATUS_COUNT, priority: int = PRIORITY_BACKGROUND):
+    """
+    One call to the global problemset.recentStatus feed (newest `count` submissions on all of Codeforces).
+    Returns a RecentPage (accepted triples + window bounds) or None on error.
+    """
+    try:
+        return await _call("problemset.recentStatus", {"count": count}, priority, RecentDecoder())
+    except CFError as e:
+        print(f"⚠️ problemset.recentStatus failed: {type(e).__name__}: {e}")
+        return None
+
+async def fetch_problemset(priority: int = PRIORITY_BACKGROUND):
     """
     Returns the list of problems (problem dicts) or None on error.
     """
-    url = "https://codeforces.com/api/problemset.problems"
-    for attempt in range(2):
-        try:
-            await _wait_rate_slot()
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as resp:
-                    if resp.status != 200:
-                        await asyncio.sleep(1)
-                        continue
-                    data = await resp.json()
-            if data.get("status") != "OK":
-                return None
-            return data.get("result", {}).get("problems", [])
-        except Exception:
-            await asyncio.sleep(1)
+    try:
+        result = await _call("problemset.problems", None, priority)
+    except CFError as e:
+        print(f"⚠️ problemset.problems failed: {type(e).__name__}: {e}")
+        return None
+    return (result or {}).get("problems", [])
+
+def unavailable_reason() -> str | None:
+    """Short user-facing reason when Codeforces is known to be down, else None."""
+    if scheduler.breaker.is_open:
+        return "Codeforces API appears to be down right now"
     return None
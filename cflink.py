@@ -1,24 +1,156 @@
 # cflink.py
+import asyncio
 import json
 import os
 import discord
 from discord.ext import commands
-from cfapi import fetch_submissions
+from cfapi import CFError, CFHandleNotFound, CFCircuitOpen, CFMaintenance
+from backend import backend
 
 HANDLES_FILE = "handles.json"
+SAVE_DELAY = 2.0   # seconds: registrations arriving within this window are written together
+GLOBAL = "0"       # namespace for DMs and for links from the old flat handles.json; visible in every guild
 
-if os.path.exists(HANDLES_FILE):
-    with open(HANDLES_FILE, "r") as f:
+
+def _write_atomic(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class HandleRegistry:
+    """
+    Discord user -> Codeforces handle links, one namespace per guild, plus a lowercase handle -> user
+    reverse index per namespace so lookups and duplicate checks are O(1). Changes are written behind:
+    bursts are coalesced into one atomic (temp file + rename) write that runs off the event loop.
+    """
+
+    def __init__(self, path=HANDLES_FILE):
+        self.path = path
+        self.guilds = {}   # namespace -> {user id str: handle}
+        self.owners = {}   # namespace -> {lowercase handle: user id str}
+        self._dirty = False
+        self._save_task = None
+        self._write_lock = asyncio.Lock()
+
+    @staticmethod
+    def _key(guild_id):
+        return str(guild_id) if guild_id else GLOBAL
+
+    def load(self):
         try:
-            handles = json.load(f)
-        except:
-            handles = {}
-else:
-    handles = {}
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read {self.path}: {e}")
+            return
+        # old files are a flat {user id: handle} map shared by every guild
+        namespaces = data["guilds"] if isinstance(data.get("guilds"), dict) else {GLOBAL: data}
+        for key, links in namespaces.items():
+            for uid, handle in links.items():
+                self._set(key, uid, handle)
 
-def save_handles():
-    with open(HANDLES_FILE, "w") as f:
-        json.dump(handles, f, indent=4)
+    def _set(self, key, uid, handle):
+        links = self.guilds.setdefault(key, {})
+        owners = self.owners.setdefault(key, {})
+        old = links.get(uid)
+        if old is not None:
+            owners.pop(old.lower(), None)
+        links[uid] = handle
+        owners[handle.lower()] = uid
+
+    def get(self, user_id, guild_id=None):
+        """Handle linked in this guild, else the user's global link."""
+        uid = str(user_id)
+        links = self.guilds.get(self._key(guild_id))
+        handle = links.get(uid) if links else None
+        if handle is None and guild_id:
+            links = self.guilds.get(GLOBAL)
+            handle = links.get(uid) if links else None
+        return handle
+
+    def owner(self, handle, guild_id=None):
+        """User id (str) the handle is linked to in this guild or globally, or None."""
+        key = handle.lower()
+        for ns in (self._key(guild_id), GLOBAL):
+            owners = self.owners.get(ns)
+            if owners and key in owners:
+                return owners[key]
+        return None
+
+    def link(self, user_id, handle, guild_id=None) -> bool:
+        """Link handle to the user in this guild; False if another user already holds it here."""
+        uid = str(user_id)
+        if self.owner(handle, guild_id) not in (None, uid):
+            return False
+        self._set(self._key(guild_id), uid, handle)
+        self._changed()
+        return True
+
+    def unlink(self, user_id, guild_id=None):
+        """
+        Remove the user's link in this guild's own namespace (the global one for guild_id=None);
+        returns the removed handle or None. Global links are shared by every guild, so a guild
+        never removes them implicitly.
+        """
+        key = self._key(guild_id)
+        uid = str(user_id)
+        links = self.guilds.get(key)
+        if not links or uid not in links:
+            return None
+        handle = links.pop(uid)
+        self.owners[key].pop(handle.lower(), None)
+        self._changed()
+        return handle
+
+    def global_handle(self, user_id):
+        links = self.guilds.get(GLOBAL)
+        return links.get(str(user_id)) if links else None
+
+    def all_handles(self):
+        """Every linked handle once (case-insensitive), across all guilds."""
+        return list({h.lower(): h for links in self.guilds.values() for h in links.values()}.values())
+
+    def _changed(self):
+        self._dirty = True
+        if self._save_task is None:
+            self._save_task = asyncio.get_running_loop().create_task(self._save_later())
+
+    async def _save_later(self):
+        try:
+            await asyncio.sleep(SAVE_DELAY)
+        finally:
+            self._save_task = None
+        await self.flush()
+
+    async def flush(self):
+        """Write pending changes now (also called on shutdown)."""
+        async with self._write_lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            # shallow copies on the loop; JSON encoding and disk I/O happen in a thread
+            snapshot = {key: dict(links) for key, links in self.guilds.items() if links}
+            try:
+                await asyncio.to_thread(_write_atomic, self.path, {"guilds": snapshot})
+            except OSError as e:
+                self._dirty = True  # retried with the next change or on shutdown
+                print(f"❌ Could not save {self.path}: {e}")
+
+    async def stop(self):
+        if self._save_task is not None:
+            self._save_task.cancel()
+            self._save_task = None
+        await self.flush()
+
+
+registry = HandleRegistry()
+registry.load()
 
 def setup(bot: commands.Bot):
 
@@ -26,21 +158,32 @@ def setup(bot: commands.Bot):
     @commands.has_permissions(manage_guild=True)
     async def register(ctx, member: discord.Member, handle: str):
         """Admin only: register @user handle"""
-        user_id = str(member.id)
+        guild_id = ctx.guild.id if ctx.guild else None
+        taken = discord.Embed(description="❌ This Codeforces handle is already linked to another user.", color=discord.Color.red())
         # prevent duplicate handle mapping
-        for uid, linked in handles.items():
-            if linked.lower() == handle.lower() and uid != user_id:
-                await ctx.send(embed=discord.Embed(description="❌ This Codeforces handle is already linked to another user.", color=discord.Color.red()))
-                return
+        if registry.owner(handle, guild_id) not in (None, str(member.id)):
+            await ctx.send(embed=taken)
+            return
 
-        # validate handle via CF API (uses cfapi rate-limiter)
-        subs = await fetch_submissions(handle)
-        if subs is None:
-            await ctx.send(embed=discord.Embed(description="❌ Invalid Codeforces handle or API error.", color=discord.Color.red()))
+        # validate handle via CF API (uses cfapi rate-limiter, in-process or in the CF worker)
+        try:
+            await backend.check_handle(handle)
+        except CFHandleNotFound:
+            await ctx.send(embed=discord.Embed(description=f"❌ Codeforces handle `{handle}` does not exist.", color=discord.Color.red()))
+            return
+        except (CFCircuitOpen, CFMaintenance):
+            await ctx.send(embed=discord.Embed(description="⚠️ Codeforces is unavailable right now. Try registering again later.", color=discord.Color.orange()))
+            return
+        except CFError:
+            await ctx.send(embed=discord.Embed(description="⚠️ Could not verify the handle with Codeforces now. Try again later.", color=discord.Color.orange()))
             return
 
-        handles[user_id] = handle
-        save_handles()
+        # re-checked: another registration may have taken the handle while we validated it
+        if not registry.link(member.id, handle, guild_id):
+            await ctx.send(embed=taken)
+            return
+        # the validation fetch above already cached the solved set; keep it warm from now on
+        await backend.touch_handles([handle])
         await ctx.send(embed=discord.Embed(description=f"✅ Registered `{handle}` for {member.mention}.", color=discord.Color.green()))
 
     @register.error
@@ -54,13 +197,32 @@ def setup(bot: commands.Bot):
     @commands.has_permissions(manage_guild=True)
     async def unregister(ctx, member: discord.Member):
         """Admin only: remove registered handle for a user"""
-        user_id = str(member.id)
-        if user_id in handles:
-            removed = handles.pop(user_id)
-            save_handles()
+        guild_id = ctx.guild.id if ctx.guild else None
+        removed = registry.unlink(member.id, guild_id)
+        if removed is not None:
+            await backend.warm_handles(all_handles())
             await ctx.send(embed=discord.Embed(description=f"✅ Unregistered `{removed}` for {member.mention}.", color=discord.Color.green()))
+        elif guild_id and registry.global_handle(member.id):
+            await ctx.send(embed=discord.Embed(
+                description=(f"⚠️ `{registry.global_handle(member.id)}` is a global link shared by every server. "
+                             "Only the bot owner can remove it, with `!unregisterglobal @user`."),
+                color=discord.Color.orange()))
         else:
             await ctx.send(embed=discord.Embed(description="⚠️ That user has no registered handle.", color=discord.Color.orange()))
 
-def get_handle(discord_user_id: int) -> str | None:
-    return handles.get(str(discord_user_id))
+    @bot.command(name="unregisterglobal")
+    @commands.is_owner()
+    async def unregister_global(ctx, member: discord.User):
+        """Bot owner only: remove a user's global link (from the old handles.json or made in DMs)"""
+        removed = registry.unlink(member.id, None)
+        if removed is not None:
+            await backend.warm_handles(all_handles())
+            await ctx.send(embed=discord.Embed(description=f"✅ Removed global link `{removed}` for {member.mention}.", color=discord.Color.green()))
+        else:
+            await ctx.send(embed=discord.Embed(description="⚠️ That user has no global link.", color=discord.Color.orange()))
+
+def all_handles():
+    return registry.all_handles()
+
+def get_handle(discord_user_id: int, guild_id: int | None = None) -> str | None:
+    return registry.get(discord_user_id, guild_id)
@@ -0,0 +1,53 @@
+# deadlines.py
+import asyncio
+import time
+
+
+class DeadlineScheduler:
+    """
+    Fires `on_due(session)` at each duel's exact end_time via loop.call_at (the loop's own timer heap),
+    so nothing runs until a duel is actually due. Every firing gets its own task, so duels that end
+    together are finalized concurrently and their CF fetches queue side by side in the shared scheduler.
+    """
+
+    def __init__(self, on_due=None):
+        self.on_due = on_due
+        self._timers = {}
+        self._tasks = set()
+
+    def arm(self, key, session):
+        """(Re)schedule `key` for session.end_time; an already-passed deadline fires on the next loop turn."""
+        self.cancel(key)
+        loop = asyncio.get_running_loop()
+        when = loop.time() + max(0.0, session.end_time - time.time())
+        self._timers[key] = loop.call_at(when, self._fire, key, session)
+
+    def cancel(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _fire(self, key, session):
+        self._timers.pop(key, None)
+        task = asyncio.get_running_loop().create_task(self._run(session))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, session):
+        try:
+            await self.on_due(session)
+        except Exception as e:
+            print("❌ Finalizing expired duel failed:", e)
+
+    def __len__(self):
+        return len(self._timers)
+
+    async def stop(self):
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+deadlines = DeadlineScheduler()
@@ -2,41 +2,102 @@
 import discord
 from discord.ext import commands, tasks
 from cflink import get_handle
-import random
 import time
 import asyncio
-from cfapi import fetch_submissions, fetch_problemset
-import json
-import os
-
-BAD_TAGS = {"output-only", "*special problem", "challenge", "expression parsing", "*special"}
-EXCLUDED_CONTEST_IDS = {952} 
-MAX_ACTIVE_DUELS = 20
+import cfapi
+from cfapi import PRIORITY_INTERACTIVE, PRIORITY_FINALIZE, PRIORITY_BACKGROUND
+from backend import backend
+import history
+from journal import journal
+from deadlines import deadlines
+from scoreboard import scoreboard
+from outbox import outbox
+from ladder import ladders
+from poller import PollPlanner
+from admission import AdmissionQueue, PendingDuel
+from scoring import DuelSession, score_solves, record_ranking, TIE
+import re
+
+MAX_ACTIVE_DUELS = 200
+SOLVED_MAX_AGE = 15 * 60  # solved sets the cache warmer refreshed this recently are used without a CF call
+LOCKOUT_MIN_PLAYERS = 3
+LOCKOUT_MAX_PLAYERS = 8
 # --- Config ---
 DEFAULT_POINTS = [100, 200, 300, 400, 500]
-RECENT_FILE = "recent_duels.json"
-MAX_RECENT = 20
 AUTO_CHECK_INTERVAL = 10  # seconds (auto-check loop interval)
+FEED_JUDGE_MARGIN = 120   # seconds; ACs created this long before a poll may still be judging and show up later
 
 # --- In-memory stores ---
-duel_sessions = {}
-pending_duel_queue = []
-recent_duels = []
-
-if os.path.exists(RECENT_FILE):
-    try:
-        with open(RECENT_FILE, "r") as f:
-            recent_duels = json.load(f)
-    except:
-        recent_duels = []
-
-def save_recent():
-    with open(RECENT_FILE, "w") as f:
-        json.dump(recent_duels[-MAX_RECENT:], f, indent=2)
+class DuelRegistry:
+    """
+    Active duels with O(1) lookups by pair key and by player id.
+    add/remove keep every index consistent; a player can be in at most one active duel.
+    Iterates like the old dict (keys, items(), values(), `key in registry`, len()).
+    """
+
+    def __init__(self):
+        self._by_key = {}       # key -> session
+        self._by_player = {}    # user id -> key
+        self._key_of = {}       # id(session) -> key
+
+    def add(self, key, session):
+        if key in self._by_key:
+            raise ValueError("a duel between these players is already active")
+        busy = [u for u in key if u in self._by_player]
+        if busy:
+            raise ValueError(f"players already in a duel: {busy}")
+        self._by_key[key] = session
+        self._key_of[id(session)] = key
+        for u in key:
+            self._by_player[u] = key
+
+    def remove(self, session):
+        """Drop a session from every index; returns its key (None if it was not registered)."""
+        key = self._key_of.pop(id(session), None)
+        if key is None:
+            return None
+        del self._by_key[key]
+        for u in key:
+            if self._by_player.get(u) == key:
+                del self._by_player[u]
+        return key
+
+    def key_of(self, session):
+        return self._key_of.get(id(session))
+
+    def for_player(self, user_id):
+        key = self._by_player.get(user_id)
+        return self._by_key[key] if key is not None else None
+
+    def is_busy(self, user_id) -> bool:
+        return user_id in self._by_player
+
+    def __len__(self):
+        return len(self._by_key)
+
+    def __contains__(self, key):
+        return key in self._by_key
+
+    def __iter__(self):
+        return iter(self._by_key)
+
+    def __getitem__(self, key):
+        return self._by_key[key]
+
+    def items(self):
+        return self._by_key.items()
+
+    def values(self):
+        return self._by_key.values()
+
+
+duel_sessions = DuelRegistry()
+_finalizing = set()  # id(session) of duels whose final update and announcement are in progress
+pending_duel_queue = AdmissionQueue(AUTO_CHECK_INTERVAL, MAX_ACTIVE_DUELS)  # over-capacity requests
 
 # --- Helpers ---
-def _session_key(a, b):
-    return (min(a, b), max(a, b))
+def _session_key(*players):
+    return tuple(sorted(players))
 
 def _format_time_left(seconds_left: float) -> str:
     if seconds_left < 0:
@@ -45,75 +106,357 @@ def _format_time_left(seconds_left: float) -> str:
     secs = int(seconds_left) % 60
     return f"{mins}m {secs}s"
 
-async def find_problem_for_rating(problems, rating, excluded_pids, submissions1, submissions2):
-    candidates = [p for p in problems if p.get("rating") == rating]
-    random.shuffle(candidates)
-    for p in candidates:
-        cid = p.get("contestId")
-        if cid in EXCLUDED_CONTEST_IDS:
+_CONTEST_RANGE_RE = re.compile(r"^(?:contest|cid):(\d+)?-(\d+)?$", re.IGNORECASE)
+
+def _parse_filters(tokens):
+    """
+    Split optional problem filters out of !duel arguments:
+      +tag / -tag            require / forbid a tag (use _ for spaces, e.g. +binary_search)
+      contest:LO-HI          contest id range (either bound may be omitted)
+    Returns (remaining tokens, filters dict). Raises ValueError on a malformed filter.
+    """
+    rest = []
+    filters = {"required_tags": [], "forbidden_tags": [], "contest_range": None}
+    for tok in tokens:
+        if len(tok) > 1 and tok[0] in "+-" and not tok[1:].isdigit():
+            tag = tok[1:].replace("_", " ").lower()
+            filters["required_tags" if tok[0] == "+" else "forbidden_tags"].append(tag)
             continue
-
-        pid = f"{p['contestId']}-{p['index']}"
-        tags = set(p.get("tags", []))
-        if tags & BAD_TAGS:
+        m = _CONTEST_RANGE_RE.match(tok)
+        if m:
+            lo = int(m.group(1)) if m.group(1) else 0
+            hi = int(m.group(2)) if m.group(2) else 10**9
+            if lo > hi:
+                raise ValueError(f"empty contest range `{tok}`")
+            filters["contest_range"] = (lo, hi)
             continue
+        if ":" in tok:
+            raise ValueError(f"unknown filter `{tok}`")
+        rest.append(tok)
+    return rest, filters
+
+async def fetch_duel_solves(session, priority=PRIORITY_INTERACTIVE):
+    """
+    Fetch each player's earliest AC times for the duel's still-unsolved problems only: one CF request
+    per player however many problems are open, all players queued at once.
+    Returns a tuple of {pid: time} maps (one per handle), or None on error.
+    """
+    open_pids = session.open_pids()
+    if not open_pids:
+        return tuple({} for _ in session.handles)
+    maps = await asyncio.gather(*(backend.problem_solves(h, open_pids, priority) for h in session.handles))
+    if any(m is None for m in maps):
+        return None
+    return tuple(maps)
+
+def _build_feed_index(sessions):
+    """(lowercase handle, pid) -> [(session, player index)] for every unsolved problem of the given duels."""
+    index = {}
+    for session in sessions:
+        open_pids = session.open_pids()
+        for i, handle in enumerate(session.handles):
+            h = handle.lower()
+            for pid in open_pids:
+                index.setdefault((h, pid), []).append((session, i))
+    return index
+
+async def poll_recent_feed(sessions, priority=PRIORITY_BACKGROUND):
+    """
+    Score all active duels from one problemset.recentStatus call.
+    Returns (hits, stale):
+      hits  — [(session, maps)] per-player solve maps for duels that have ACs in the feed
+      stale — duels whose unchecked window reaches further back than the feed does; they need per-handle fetches
+    Duels fully covered by the feed get their `checked_through` moved forward.
+    """
+    polled_at = time.time()
+    page = await backend.recent_status(priority)
+    if page is None:
+        return [], list(sessions)
+
+    stale = []
+    covered = []
+    for session in sessions:
+        # the feed is complete for this duel if it reaches back to the last moment we were sure about
+        if page.count < cfapi.RECENT_STATUS_COUNT or (page.oldest_time is not None and page.oldest_time <= session.checked_through):
+            covered.append(session)
+        else:
+            stale.append(session)
+
+    index = _build_feed_index(covered)
+    found = {}
+    for handle, pid, t in page.accepted:
+        for session, i in index.get((handle, pid), ()):
+            maps = found.setdefault(id(session), (session, [{} for _ in session.handles]))[1]
+            if pid not in maps[i] or t < maps[i][pid]:
+                maps[i][pid] = t
+
+    for session in covered:
+        session.checked_through = max(session.checked_through, polled_at - FEED_JUDGE_MARGIN)
+    hits = [(session, tuple(maps)) for session, maps in found.values()]
+    return hits, stale
+
+def _problem_field_name(session, i):
+    return f"Q{i+1} [{session.ratings[i]}] — {session.points[i]} pts"
+
+def _build_status_embed(session, events):
+    """Full "Duel Status" embed; events are score_solves award tuples (slot, winner, pts, time)."""
+    # announce full status (duel_status style) — show all problems and current points
+    embed = discord.Embed(title="📊 Duel Status", color=discord.Color.blue())
+    embed.description = "  vs  ".join(f"<@{u}>" for u in session.players)
+
+    for i, pid in enumerate(session.pids):
+        p = session.problems[i]
+        solved_by = session.solver_label(i)
+        if solved_by == "tie":
+            value = f"{p['name']}\n`{pid}`\nTie — no points 🔒 LOCKED"
+        elif solved_by:
+            value = f"{p['name']}\n`{pid}`\nSolved by `{solved_by}` 🔒 LOCKED"
+        else:
+            link = f"https://codeforces.com/contest/{p['contestId']}/problem/{p['index']}"
+            value = f"[{p['name']}]({link})\n`{pid}`\nUnsolved"
+        embed.add_field(name=_problem_field_name(session, i), value=value, inline=False)
+
+    embed.add_field(
+        name="Points",
+        value="\n".join(f"**{h}**: {session.scores[i]} pts" for i, h in enumerate(session.handles)),
+        inline=False
+    )
+
+    # Optionally show what was newly awarded this update (if any)
+    if events:
+        text = ""
+        for slot, winner, pts, _ in events:
+            if winner == TIE:
+                text += f"Q{slot+1} — tie (no pts)\n"
+            else:
+                text += f"Q{slot+1} — awarded {pts} pts to {session.handles[winner]}\n"
+        embed.add_field(name="Recent changes", value=text, inline=False)
 
-        if pid in excluded_pids:
-            continue
-        if pid in submissions1 or pid in submissions2:
-            continue
-
-        return p
-
-    return None
+    embed.set_footer(text=_status_footer(session))
+    return embed
 
-async def get_unsolved_problems_for_ratings(handle1, handle2, ratings_list):
-    # DIRECT calls only — NO CACHE
-    submissions1 = await fetch_submissions(handle1)
-    submissions2 = await fetch_submissions(handle2)
-    if submissions1 is None or submissions2 is None:
-        return None
+def _status_footer(session):
+    return f"Time left: {_format_time_left(session.time_left())}"
 
-    problems = await fetch_problemset()
-    if not problems:
-        return None
+scoreboard.render = _build_status_embed
+scoreboard.footer = _status_footer
 
-    selected = []
-    excluded = set()
-    for r in ratings_list:
-        p = await find_problem_for_rating(problems, r, excluded, submissions1, submissions2)
-        if p is None:
-            # fallback search by nearby ratings
-            found = None
-            for offset in [100, -100, 200, -200, 300, -300, 400, -400, 500, -500]:
-                target = r + offset
-                found = await find_problem_for_rating(problems, target, excluded, submissions1, submissions2)
-                if found:
-                    break
-            if not found:
-                return None
-            p = found
-        pid = f"{p['contestId']}-{p['index']}"
-        excluded.add(pid)
-        selected.append(p)
-    return selected
+def _parse_ratings(tail):
+    """Numeric !duel arguments -> (ratings_list, time_min); raises ValueError with a user-facing message."""
+    if len(tail) not in (0, 2, 4):
+        raise ValueError("Invalid numeric arguments. Use base/time or min max num time.")
+    try:
+        if len(tail) == 2:
+            base_rating = int(tail[0])
+            time_min = int(tail[1])
+            num = 5
+            ratings_list = [base_rating + i * 100 for i in range(num)]
+        elif len(tail) == 4:
+            min_rating = int(tail[0]); max_rating = int(tail[1]); num = int(tail[2]); time_min = int(tail[3])
+            if num == 1:
+                ratings_list = [min_rating]
+            else:
+                step = (max_rating - min_rating) // (num - 1)
+                ratings_list = [min_rating + i * step for i in range(num)]
+        else:
+            min_rating = 800; max_rating = 2400; num = 5; time_min = 30
+            step = (max_rating - min_rating) // (num - 1)
+            ratings_list = [min_rating + i * step for i in range(num)]
+    except ValueError:
+        raise ValueError("Invalid numeric args.") from None
+    return ratings_list, time_min
+
+def launch_duel(channel, guild_id, players, handles, problems, ratings_list, time_min, title="🤝 Duel Started"):
+    """
+    Register, journal, arm and announce a new duel. Raises ValueError if one of the players is already
+    in a duel. Returns the session.
+    """
+    points = DEFAULT_POINTS.copy() if len(problems) == 5 else [100*(i+1) for i in range(len(problems))]
+    pids = [f"{p['contestId']}-{p['index']}" for p in problems]
+    session = DuelSession(
+        players=tuple(players),
+        handles=tuple(handles),
+        problems=problems,
+        pids=pids,
+        ratings=ratings_list,
+        points=points,
+        start_time=time.time(),
+        time_limit=time_min * 60,
+        channel_id=channel.id,
+        guild_id=guild_id,
+    )
+    key = _session_key(*players)
+    duel_sessions.add(key, session)
+    journal.started(key, session)
+    deadlines.arm(key, session)
+    _drop_queued(players, "started another duel")
+
+    # announce
+    embed = discord.Embed(title=title, color=discord.Color.green())
+    embed.description = "  vs  ".join(f"<@{u}>" for u in players)
+    for i, p in enumerate(problems):
+        link = f"https://codeforces.com/contest/{p['contestId']}/problem/{p['index']}"
+        embed.add_field(name=_problem_field_name(session, i),
+                        value=f"[{p['name']}]({link})\n`{pids[i]}`", inline=False)
+    embed.set_footer(text=f"Time limit: {time_min} minutes. Players report solves with `!update`.")
+    outbox.send(channel, embed=embed)
+    return session
+
+def _drop_queued(players, why):
+    """Remove queued requests involving any of these players, telling their channels why."""
+    for entry in pending_duel_queue.drop_players(players):
+        outbox.send(entry.channel, embed=discord.Embed(
+            description=f"🗑️ Queued match {entry.label} was dropped: one of its players {why}.",
+            color=discord.Color.orange()))
+
+def _active_load():
+    """(polled handles, duels) of the running duels, as the admission queue counts them."""
+    active = [s for s in duel_sessions.values() if not s.ended]
+    return sum(len(s.handles) for s in active), len(duel_sessions)
+
+async def _prepare_and_launch(entry):
+    """
+    Pick problems unsolved by every player and launch an admitted request; failures are reported in
+    its channel through the outbox (this also runs from the admit_pending background task). Returns the
+    session or None.
+    """
+    channel = entry.channel
+    try:
+        outbox.send(channel, embed=discord.Embed(description=f"🔍 Fetching problems for {entry.label} ...", color=discord.Color.blue()))
+        # one solved-set fetch per player; catalog.select ORs them into one combined solved bitset
+        await backend.touch_handles(entry.handles)
+        problems = await backend.select_problems(list(entry.handles), entry.ratings_list, entry.filters, SOLVED_MAX_AGE)
+        if not problems:
+            reason = await backend.unavailable_reason()
+            if reason:
+                outbox.send(channel, embed=discord.Embed(description=f"⚠️ {reason}. Try again later.", color=discord.Color.orange()))
+            else:
+                outbox.send(channel, embed=discord.Embed(description="❌ Could not find enough problems unsolved by every player.", color=discord.Color.red()))
+            return None
+        try:
+            return launch_duel(channel, entry.guild_id, entry.players, entry.handles, problems,
+                               entry.ratings_list, entry.time_min, title=entry.title)
+        except ValueError:
+            # a concurrent command for one of these players won the race while we fetched problems
+            outbox.send(channel, embed=discord.Embed(description="❌ One of these players just started another duel.", color=discord.Color.red()))
+            return None
+    finally:
+        pending_duel_queue.started(entry)
+
+async def admit_or_queue(ctx, entry):
+    """
+    Start the request now if the API budget has room (True), otherwise queue it and tell the players
+    their position and ETA (False). A newer request replaces any queued one of the same players.
+    """
+    _drop_queued(entry.players, "requested another match")
+    st = await backend.api_stats()
+    load, duels = _active_load()
+    if pending_duel_queue.admits(entry, load, duels, st["interval"]):
+        pending_duel_queue.begin(entry)
+        return True
+    position = pending_duel_queue.push(entry)
+    if position is None:
+        await ctx.send(embed=discord.Embed(
+            title="⏳ Duel Queue Full",
+            description=f"**{pending_duel_queue.limit}** matches are already waiting for capacity. Please try again later.",
+            color=discord.Color.orange()))
+        return False
+    eta = pending_duel_queue.eta(position, [s for s in duel_sessions.values() if not s.ended], load, duels, st["interval"])
+    await ctx.send(embed=discord.Embed(
+        title="⏳ Duel Queued",
+        description=(f"The Codeforces API budget is fully used by running duels, so {entry.label} is queued at "
+                     f"position **{position}** (ETA ~{_format_time_left(eta)}).\n"
+                     "It starts automatically when capacity frees up; a new `!duel`/`!lockout` by any of its players drops it."),
+        color=discord.Color.orange()))
+    return False
+
+_admission_tasks = set()
+
+def _admission_done(task):
+    _admission_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print("❌ Admission check failed:", task.exception())
+
+def schedule_admission():
+    """Run admit_pending in the background, keeping a reference so the task survives until it ends."""
+    task = asyncio.get_running_loop().create_task(admit_pending())
+    _admission_tasks.add(task)
+    task.add_done_callback(_admission_done)
+
+async def admit_pending():
+    """Start queued requests, oldest first, while the API budget has room for them."""
+    if pending_duel_queue.draining or not pending_duel_queue:
+        return
+    pending_duel_queue.draining = True
+    try:
+        while True:
+            st = await backend.api_stats()
+            entry = pending_duel_queue.pop_ready(*_active_load(), st["interval"])
+            if entry is None:
+                return
+            try:
+                await _prepare_and_launch(entry)
+            except Exception as e:
+                print("❌ Failed to start queued duel:", e)
+    except Exception as e:
+        print("❌ Admission check failed:", e)
+    finally:
+        pending_duel_queue.draining = False
+
+# callbacks(session, record) run after a duel's result has been recorded and the duel unregistered (e.g. tournament progress)
+duel_finished = []
+
+
+def _score(session, maps):
+    """
+    score_solves + journal the awards so a restart can replay them. Once a duel has ended only its own
+    final update may score it; late results from other fetches are dropped.
+    """
+    key = duel_sessions.key_of(session)
+    if key is None or (session.ended and id(session) not in _finalizing):
+        return []
+    events = score_solves(session, maps)
+    journal.awarded(key, events)
+    return events
+
+def restore_sessions():
+    """Rebuild active duels from the on-disk journal (call once at startup, before the bot connects)."""
+    recovered = journal.recover()
+    for key, session in recovered.items():
+        duel_sessions.add(key, session)
+    _recovered.extend(recovered.values())
+    journal.start(duel_sessions.items)
+    if recovered:
+        print(f"✅ Recovered {len(recovered)} active duels")
+    return len(recovered)
+
+_recovered = []  # sessions restored at startup that still need a catch-up scoring pass
 
 def _record_recent(session):
-    rec = {
-        "players": session["players"],
-        "handles": session["handles"],
-        "ratings": session["ratings"],
-        "points": session["points"],
-        "scores": session["scores"],
-        "per_problem": session["per_problem"],
-        "start_time": session["start_time"],
-        "end_time": time.time()
-    }
-    recent_duels.append(rec)
-    save_recent()
+    rec = session.to_record()
+    history.store.record(rec)
+    return rec
+
+def _recent_field(d):
+    rows = record_ranking(d)
+    # same rule as the final announcement: points, then who reached their total first
+    if len(rows) > 1 and rows[0][1:] == rows[1][1:]:
+        winner = "Draw"
+    else:
+        winner = rows[0][0]
+
+    duration = int(d["end_time"] - d["start_time"])
+    return (
+        " vs ".join(d["handles"]),
+        f"  **Winner:** {winner}\n"
+        f"  **Score:** {' – '.join(str(d['scores'].get(h, 0)) for h in d['handles'])}\n"
+        f"  **Duration:** {duration // 60}m {duration % 60}s",
+    )
 
 # --- Main setup ---
 def setup(bot: commands.Bot):
+    # a finished duel frees API budget for queued requests
+    duel_finished.append(lambda session, rec: schedule_admission())
 
     @bot.command()
     async def duel(ctx, *args):
@@ -122,6 +465,7 @@ def setup(bot: commands.Bot):
         - !duel @p1 @p2 base_rating time_min
         - !duel @p1 @p2 min max num time_min
         - !duel @p2 base_rating time_min  (you vs @p2)
+        Optional filters anywhere after the mentions: +tag, -tag, contest:LO-HI
         """
         mentions = ctx.message.mentions
         if not mentions:
@@ -141,32 +485,20 @@ def setup(bot: commands.Bot):
         # parse numeric args from remaining tokens (simple approach)
         tokens = ctx.message.content.split()
         tail = tokens[1 + tail_start:] if len(tokens) > 1 + tail_start else []
+        try:
+            tail, filters = _parse_filters(tail)
+        except ValueError as e:
+            await ctx.send(embed=discord.Embed(description=f"❌ Invalid filter: {e}.", color=discord.Color.red()))
+            return
 
         try:
-            if len(tail) == 2:
-                base_rating = int(tail[0])
-                time_min = int(tail[1])
-                num = 5
-                ratings_list = [base_rating + i * 100 for i in range(num)]
-            elif len(tail) == 4:
-                min_rating = int(tail[0]); max_rating = int(tail[1]); num = int(tail[2]); time_min = int(tail[3])
-                if num == 1:
-                    ratings_list = [min_rating]
-                else:
-                    step = (max_rating - min_rating) // (num - 1)
-                    ratings_list = [min_rating + i * step for i in range(num)]
-            elif len(tail) == 0:
-                min_rating = 800; max_rating = 2400; num = 5; time_min = 30
-                step = (max_rating - min_rating) // (num - 1)
-                ratings_list = [min_rating + i * step for i in range(num)]
-            else:
-                await ctx.send(embed=discord.Embed(description="❌ Invalid numeric arguments. Use base/time or min max num time.", color=discord.Color.red()))
-                return
-        except ValueError:
-            await ctx.send(embed=discord.Embed(description="❌ Invalid numeric args.", color=discord.Color.red()))
+            ratings_list, time_min = _parse_ratings(tail)
+        except ValueError as e:
+            await ctx.send(embed=discord.Embed(description=f"❌ {e}", color=discord.Color.red()))
             return
 
-        h1 = get_handle(p1.id); h2 = get_handle(p2.id)
+        guild_id = ctx.guild.id if ctx.guild else None
+        h1 = get_handle(p1.id, guild_id); h2 = get_handle(p2.id, guild_id)
         if not h1 or not h2:
             msg = "❌ Duel cannot start because:\n"
             if not h1:
@@ -176,263 +508,228 @@ def setup(bot: commands.Bot):
             msg += "Admins can register handles with `!register @user handle`."
             await ctx.send(embed=discord.Embed(description=msg, color=discord.Color.orange()))
             return
-        # Enforce max active duels
-        if len(duel_sessions) >= MAX_ACTIVE_DUELS:
-            await ctx.send(embed=discord.Embed(
-                title="⏳ Duel Limit Reached",
-                description=(
-                    f"Maximum **{MAX_ACTIVE_DUELS} active duels** are currently running.\n"
-                    "Please wait for a duel to finish and try again."
-                ),
-                color=discord.Color.orange()
-            ))
-            return
 
         key = _session_key(p1.id, p2.id)
         if key in duel_sessions:
             await ctx.send(embed=discord.Embed(description="❌ A duel between these players is already active.", color=discord.Color.red()))
             return
+        busy = [p for p in (p1, p2) if duel_sessions.is_busy(p.id)]
+        if busy:
+            names = ", ".join(f"`{p.display_name}`" for p in busy)
+            await ctx.send(embed=discord.Embed(description=f"❌ {names} already in an active duel.", color=discord.Color.red()))
+            return
 
-        # prepare duel: fetch problems (direct calls only)
-        await ctx.send(embed=discord.Embed(description=f"🔍 Fetching problems for {p1.display_name} vs {p2.display_name} ...", color=discord.Color.blue()))
-        problems = await get_unsolved_problems_for_ratings(h1, h2, ratings_list)
-        if not problems:
-            await ctx.send(embed=discord.Embed(description="❌ Could not find enough unsolved problems for these players.", color=discord.Color.red()))
+        unknown = await backend.unknown_tags(filters["required_tags"] + filters["forbidden_tags"])
+        if unknown:
+            await ctx.send(embed=discord.Embed(description=f"❌ Unknown tag(s): {', '.join(f'`{t}`' for t in unknown)}", color=discord.Color.red()))
             return
 
-        points = DEFAULT_POINTS.copy() if len(problems) == 5 else [100*(i+1) for i in range(len(problems))]
-        pids = [f"{p['contestId']}-{p['index']}" for p in problems]
-        session = {
-            "players": (p1.id, p2.id),
-            "handles": (h1, h2),
-            "problems": problems,
-            "problems_pids": pids,
-            "ratings": ratings_list,
-            "points": points,
-            "scores": {h1: 0, h2: 0},
-            "score_times": {h1: None, h2: None},
-            "score_reached": {h1: {}, h2: {}},
-            "per_problem": {pid: {"solved_by": None, "first_time": None} for pid in pids},
-            "start_time": time.time(),
-            "time_limit": time_min * 60,
-            "end_time": time.time() + (time_min * 60),
-            "ended": False,
-            "channel_id": ctx.channel.id
-        }
-        duel_sessions[key] = session
-
-        # announce
-        embed = discord.Embed(title="🤝 Duel Started", color=discord.Color.green())
-        embed.description = f"{p1.mention}  vs  {p2.mention}"
-        for i, p in enumerate(problems):
-            link = f"https://codeforces.com/contest/{p['contestId']}/problem/{p['index']}"
-            embed.add_field(name=f"Q{i+1} [{ratings_list[i]}] — {points[i]} pts",
-                            value=f"[{p['name']}]({link})\n`{pids[i]}`", inline=False)
-        embed.set_footer(text=f"Time limit: {time_min} minutes. Players report solves with `!update`.")
-        await ctx.send(embed=embed)
+        # over the API budget the request waits in pending_duel_queue and starts from admit_pending
+        entry = PendingDuel(ctx.channel, guild_id, (p1.id, p2.id), (h1, h2), ratings_list, filters, time_min,
+                            label=f"{p1.display_name} vs {p2.display_name}", title="🤝 Duel Started")
+        if await admit_or_queue(ctx, entry):
+            # prepare duel: fetch solved sets, pick problems and launch
+            await _prepare_and_launch(entry)
 
-    @bot.command(name="update")
-    async def update_cmd(ctx):
+    @bot.command()
+    async def lockout(ctx, *args):
         """
-        Check both players' Codeforces submissions and update any newly accepted unsolved duel problems.
-        Announces only when there are new awards (embed) and tags both players.
+        Lockout match for 3-8 players in one session (first AC on a problem takes its points):
+        - !lockout @p1 @p2 @p3 ... [base_rating time_min | min max num time_min] [+tag -tag contest:LO-HI]
+        Problems are unsolved by every participant; results are announced but not rated.
         """
-        session_key = next((k for k in duel_sessions if ctx.author.id in k), None)
-        if not session_key:
-            await ctx.send(embed=discord.Embed(description="❌ You're not in an active duel.", color=discord.Color.red()))
+        members = list(dict.fromkeys(ctx.message.mentions))
+        if not LOCKOUT_MIN_PLAYERS <= len(members) <= LOCKOUT_MAX_PLAYERS:
+            await ctx.send(embed=discord.Embed(description=f"❌ Mention between {LOCKOUT_MIN_PLAYERS} and {LOCKOUT_MAX_PLAYERS} players.", color=discord.Color.red()))
             return
-        session = duel_sessions[session_key]
-        if session["ended"]:
-            await ctx.send(embed=discord.Embed(description="❗ This duel has already ended.", color=discord.Color.orange()))
+        tail = [tok for tok in ctx.message.content.split()[1:] if not tok.startswith("<@")]
+        try:
+            tail, filters = _parse_filters(tail)
+            ratings_list, time_min = _parse_ratings(tail)
+        except ValueError as e:
+            await ctx.send(embed=discord.Embed(description=f"❌ {e}", color=discord.Color.red()))
             return
 
-        # direct fetch (no cache)
-        h1, h2 = session["handles"]
-        subs1 = await fetch_submissions(h1)
-        subs2 = await fetch_submissions(h2)
-        if subs1 is None or subs2 is None:
-            await ctx.send(embed=discord.Embed(description="⚠️ Could not fetch submissions from Codeforces now. Try again later.", color=discord.Color.orange()))
+        guild_id = ctx.guild.id if ctx.guild else None
+        handles = [get_handle(m.id, guild_id) for m in members]
+        missing = [m for m, h in zip(members, handles) if not h]
+        if missing:
+            names = ", ".join(f"`{m.display_name}`" for m in missing)
+            await ctx.send(embed=discord.Embed(description=f"❌ No registered handle for {names}.", color=discord.Color.orange()))
+            return
+        busy = [m for m in members if duel_sessions.is_busy(m.id)]
+        if busy:
+            names = ", ".join(f"`{m.display_name}`" for m in busy)
+            await ctx.send(embed=discord.Embed(description=f"❌ {names} already in an active duel.", color=discord.Color.red()))
             return
 
-        newly_awarded = []
-        now = time.time()
-
-        # enforce duel end-time: only accept ACs with creationTimeSeconds <= end_time
-        end_ts = int(session.get("end_time", int(session["start_time"] + session["time_limit"])))
-        for idx, pid in enumerate(session["problems_pids"]):
-            if session["per_problem"][pid]["solved_by"] is not None:
-                continue
-
-            t1 = subs1.get(pid)
-            t2 = subs2.get(pid)
-
-            valid1 = (t1 is not None and int(t1) <= end_ts)
-            valid2 = (t2 is not None and int(t2) <= end_ts)
-            if not valid1 and not valid2:
-                continue
+        unknown = await backend.unknown_tags(filters["required_tags"] + filters["forbidden_tags"])
+        if unknown:
+            await ctx.send(embed=discord.Embed(description=f"❌ Unknown tag(s): {', '.join(f'`{t}`' for t in unknown)}", color=discord.Color.red()))
+            return
 
-            # normalize timestamps to ints for comparisons
-            t1i = int(t1) if valid1 else None
-            t2i = int(t2) if valid2 else None
-
-            if valid1 and valid2:
-                if t1i < t2i:
-                    award = h1; ft = t1i
-                elif t2i < t1i:
-                    award = h2; ft = t2i
-                else:
-                    # same-second tie-break: prefer detection order (award to h1)
-                    award = h1; ft = t1i
-            elif valid1:
-                award = h1; ft = t1i
-            elif valid2:
-                award = h2; ft = t2i
-            else:
-                continue  # should not reach here
+        entry = PendingDuel(ctx.channel, guild_id, [m.id for m in members], handles, ratings_list, filters, time_min,
+                            label=f"a {len(members)}-player lockout", title="🔒 Lockout Started")
+        if await admit_or_queue(ctx, entry):
+            await _prepare_and_launch(entry)
 
-            if award == "tie":
-                session["per_problem"][pid]["solved_by"] = "tie"
-                session["per_problem"][pid]["first_time"] = ft
-                newly_awarded.append((idx, pid, "tie", 0))
-            else:
-                pts = session["points"][idx] if idx < len(session["points"]) else 100*(idx+1)
-                session["per_problem"][pid]["solved_by"] = award
-                session["per_problem"][pid]["first_time"] = ft
-                # update cumulative score
-                session["scores"][award] = session["scores"].get(award, 0) + pts
-                # record the submission time (CF timestamp) for tie-breaks (legacy field)
-                session["score_times"].setdefault(award, ft)
-                # record when this player first reached this new cumulative total
-                new_total = session["scores"][award]
-                session.setdefault("score_reached", {})
-                session["score_reached"].setdefault(award, {})
-                session["score_reached"][award].setdefault(new_total, ft)
-                newly_awarded.append((idx, pid, award, pts))
-
-        # announce full status (duel_status style) — show all problems and current points
-        p0, p1_ids = session["players"][0], session["players"][1]
-        embed = discord.Embed(title="📊 Duel Status", color=discord.Color.blue())
-        embed.description = f"<@{p0}>  vs  <@{p1_ids}>"
-
-        for i, pid in enumerate(session["problems_pids"]):
-            p = session["problems"][i]
-            info = session["per_problem"].get(pid, {})
-            solved_by = info.get("solved_by")
-            if solved_by == "tie":
-                value = f"{p['name']}\n`{pid}`\nTie — no points 🔒 LOCKED"
-            elif solved_by:
-                value = f"{p['name']}\n`{pid}`\nSolved by `{solved_by}` 🔒 LOCKED"
-            else:
-                link = f"https://codeforces.com/contest/{p['contestId']}/problem/{p['index']}"
-                value = f"[{p['name']}]({link})\n`{pid}`\nUnsolved"
-            embed.add_field(name=f"Q{i+1} [{session['ratings'][i]}] — {session['points'][i]} pts", value=value, inline=False)
+    @bot.command(name="queue")
+    async def queue_cmd(ctx, action: str = None):
+        """
+        Duels waiting for Codeforces API capacity:
+        - !queue        — list them with ETAs
+        - !queue leave  — withdraw your queued match
+        """
+        if action == "leave":
+            dropped = pending_duel_queue.drop_players([ctx.author.id])
+            if not dropped:
+                await ctx.send(embed=discord.Embed(description="⚠️ You have no queued match.", color=discord.Color.orange()))
+                return
+            await ctx.send(embed=discord.Embed(description=f"✅ Removed {dropped[0].label} from the queue.", color=discord.Color.green()))
+            return
+        if not pending_duel_queue:
+            await ctx.send(embed=discord.Embed(description="📭 No matches are waiting.", color=discord.Color.blue()))
+            return
+        st = await backend.api_stats()
+        load, duels = _active_load()
+        active = [s for s in duel_sessions.values() if not s.ended]
+        lines = [f"**{n}.** {e.label} — ETA ~{_format_time_left(pending_duel_queue.eta(n, active, load, duels, st['interval']))}"
+                 for n, e in enumerate(pending_duel_queue, 1)]
+        embed = discord.Embed(title="⏳ Duel Queue", description="\n".join(lines), color=discord.Color.orange())
+        embed.set_footer(text=f"Capacity: {pending_duel_queue.capacity(st['interval'])} polled handles • in use: {load}")
+        await ctx.send(embed=embed)
 
-        embed.add_field(
-            name="Points",
-            value=f"**{session['handles'][0]}**: {session['scores'].get(session['handles'][0],0)} pts\n**{session['handles'][1]}**: {session['scores'].get(session['handles'][1],0)} pts",
-            inline=False
-        )
+    @bot.command(name="update")
+    async def update_cmd(ctx):
+        """
+        Check every player's Codeforces submissions and update any newly accepted unsolved duel problems.
+        The duel's live scoreboard message is edited in place (debounced, so bursts cost one write).
+        """
+        session = duel_sessions.for_player(ctx.author.id)
+        if session is None:
+            await ctx.send(embed=discord.Embed(description="❌ You're not in an active duel.", color=discord.Color.red()))
+            return
+        if session.ended:
+            await ctx.send(embed=discord.Embed(description="❗ This duel has already ended.", color=discord.Color.orange()))
+            return
 
-        # Optionally show what was newly awarded this update (if any)
-        if newly_awarded:
-            text = ""
-            for idx, pid, award_handle, pts in newly_awarded:
-                if award_handle == "tie":
-                    text += f"Q{idx+1} — tie (no pts)\n"
-                else:
-                    text += f"Q{idx+1} — awarded {pts} pts to {award_handle}\n"
-            embed.add_field(name="Recent changes", value=text, inline=False)
+        solves = await fetch_duel_solves(session, PRIORITY_INTERACTIVE)
+        if session.ended:
+            return  # finished while we fetched (deadline, !endduel); its final results are being posted
+        if solves is None:
+            reason = await backend.unavailable_reason() or "Could not fetch submissions from Codeforces now"
+            await ctx.send(embed=discord.Embed(description=f"⚠️ {reason}. Try again later.", color=discord.Color.orange()))
+            return
+        session.last_activity = time.time()
 
-        time_left = session["time_limit"] - (time.time() - session["start_time"])
-        embed.set_footer(text=f"Time left: {_format_time_left(time_left)}")
-        ch = bot.get_channel(session["channel_id"])
-        await ch.send(embed=embed)
+        # only ACs with creationTimeSeconds <= end_time count (enforced by score_solves)
+        events = _score(session, solves)
+        scoreboard.refresh(session, bot.get_channel(session.channel_id), events, force=True)
 
-        await _maybe_finalize(session_key, session, bot)
+        await _maybe_finalize(session)
 
     # NOTE: duel_status command removed as requested
 
     @bot.command()
     async def problems(ctx):
-        session_key = next((k for k in duel_sessions if ctx.author.id in k), None)
-        if not session_key:
+        session = duel_sessions.for_player(ctx.author.id)
+        if session is None:
             await ctx.send(embed=discord.Embed(description="❌ You're not in an active duel.", color=discord.Color.red()))
             return
-        session = duel_sessions[session_key]
         embed = discord.Embed(title="🧾 Duel Problems", color=discord.Color.green())
-        for i, p in enumerate(session["problems"]):
-            pid = session["problems_pids"][i]
-            info = session["per_problem"].get(pid, {})
-            solved_by = info.get("solved_by")
-            if solved_by:
+        for i, p in enumerate(session.problems):
+            pid = session.pids[i]
+            if session.solved_by[i] is not None:
                 # locked, no link
-                embed.add_field(name=f"Q{i+1} [{session['ratings'][i]}] — {session['points'][i]} pts",
+                embed.add_field(name=_problem_field_name(session, i),
                                 value=f"{p['name']}\n`{pid}`\nSolved — 🔒 LOCKED", inline=False)
             else:
                 link = f"https://codeforces.com/contest/{p['contestId']}/problem/{p['index']}"
-                embed.add_field(name=f"Q{i+1} [{session['ratings'][i]}] — {session['points'][i]} pts",
+                embed.add_field(name=_problem_field_name(session, i),
                                 value=f"[{p['name']}]({link}) — `{pid}`", inline=False)
         await ctx.send(embed=embed)
 
     @bot.command()
     async def endduel(ctx):
-        session_key = next((k for k in duel_sessions if ctx.author.id in k), None)
-        if not session_key:
+        session = duel_sessions.for_player(ctx.author.id)
+        if session is None:
             await ctx.send(embed=discord.Embed(description="❌ You're not in an active duel.", color=discord.Color.red()))
             return
-        session = duel_sessions[session_key]
-        if session["ended"]:
+        if session.ended:
             await ctx.send(embed=discord.Embed(description="⚠️ This duel has already ended.", color=discord.Color.orange()))
             return
 
-        # Do a final silent update before finalizing
-        try:
-            await _update_scores(session)
-        except Exception as e:
-            print("❌ Final update failed on manual end:", e)
-
-        session["ended"] = True
-        await _finalize_and_announce(session)
+        # _finalize_and_announce does the final silent update
+        session.ended = True
+        await _finalize_and_announce(session, PRIORITY_INTERACTIVE)
 
     @bot.command()
     async def commands(ctx):
         """Show brief command guide."""
         embed = discord.Embed(title="📚 Bot Commands", color=discord.Color.teal())
         embed.add_field(name="Linking (admin)", value="`!register @user handle` — register CF handle\n`!unregister @user` — remove registration", inline=False)
-        embed.add_field(name="Duel (start)", value="`!duel @p1 @p2 base_rating time_min` — start duel", inline=False)
+        embed.add_field(name="Duel (start)", value="`!duel @p1 @p2 base_rating time_min` — start duel\nFilters: `+tag` `-tag` (use `_` for spaces), `contest:1500-1900`", inline=False)
+        embed.add_field(name="Lockout", value="`!lockout @p1 @p2 @p3 ... [base time]` — 3–8 players, one problem set, first AC takes the points", inline=False)
+        embed.add_field(name="Tournament", value="`!tournament @p1 @p2 @p3 ... [base time]` — round-robin (3–16 players); `!tournament status` / `cancel`", inline=False)
+        embed.add_field(name="Queue", value="`!queue` — matches waiting for API capacity; `!queue leave` — leave it", inline=False)
         embed.add_field(name="Report / Status", value="`!update` — update solves and show full duel status; `!problems` — list problems; `!endduel` — end duel", inline=False)
-        embed.add_field(name="History", value="`!recent` — show recent duels", inline=False)
+        embed.add_field(name="History", value="`!recent [@user]` — show recent duels (all, or one player's)", inline=False)
+        embed.add_field(name="Ladder", value="`!leaderboard [page]` — guild Elo ladder; `!rank [@user]` — rating and rank", inline=False)
+        embed.add_field(name="Diagnostics", value="`!apistats` — Codeforces API queue stats", inline=False)
+        await ctx.send(embed=embed)
+
+    @bot.command()
+    async def apistats(ctx):
+        """Show Codeforces request scheduler queue depth and wait times."""
+        st = await backend.api_stats()
+        names = {cfapi.PRIORITY_INTERACTIVE: "interactive", PRIORITY_FINALIZE: "finalize", PRIORITY_BACKGROUND: "background"}
+        embed = discord.Embed(title="📡 Codeforces API", color=discord.Color.blue())
+        embed.add_field(
+            name="Queue",
+            value="\n".join(f"{names[p]}: {st['queue_by_priority'][p]} queued, avg wait {st['avg_wait'][p]:.1f}s" for p in names),
+            inline=False
+        )
+        embed.add_field(
+            name="Totals",
+            value=(f"in flight: {st['in_flight']} | sent: {st['sent']} | coalesced: {st['coalesced']} | "
+                   f"expired: {st['expired']} | max wait: {st['max_wait']:.1f}s | interval: {st['interval']:.1f}s | "
+                   f"circuit: {st['breaker']}"),
+            inline=False
+        )
         await ctx.send(embed=embed)
 
-    async def _maybe_finalize(session_key, session, bot_ref):
-        now = time.time()
-        if all(session["per_problem"][pid]["solved_by"] is not None for pid in session["problems_pids"]) or (now - session["start_time"] > session["time_limit"]):
-            session["ended"] = True
+    async def _maybe_finalize(session):
+        if not session.ended and (session.all_solved() or session.is_over()):
+            session.ended = True
             await _finalize_and_announce(session)
 
-    async def _finalize_and_announce(session):
+    async def _finalize_and_announce(session, priority=PRIORITY_FINALIZE):
+        # the deadline timer, !endduel, !update and auto-check can all get here: announce and rate only once
+        if id(session) in _finalizing or duel_sessions.key_of(session) is None:
+            return
+        _finalizing.add(id(session))
+        try:
+            await _finalize(session, priority)
+        finally:
+            _finalizing.discard(id(session))
+
+    async def _finalize(session, priority):
+        deadlines.cancel(duel_sessions.key_of(session))
+        scoreboard.close(session)
         # Do one final silent update to pick up last-second ACs (honoring submission timestamps)
         try:
-            await _update_scores(session)
+            await _update_scores(session, priority)
         except Exception as e:
             print("❌ Final update failed before finalizing:", e)
 
-        h1, h2 = session["handles"]
-        pids = session["problems_pids"]
-        problems = session["problems"]
-        scores = session["scores"]
-        channel = session.get("channel") or bot.get_channel(session["channel_id"])
+        channel = bot.get_channel(session.channel_id)
 
         embed = discord.Embed(title="🏁 Duel Finished — Final Results", color=discord.Color.green())
-        players = session.get("players", None)
-        if players:
-            u1, u2 = players
-            embed.description = f"{'<@' + str(u1) + '>'} vs {'<@' + str(u2) + '>'}"
-
-        for i, pid in enumerate(pids):
-            p = problems[i]
-            info = session["per_problem"].get(pid, {})
-            solved_by = info.get("solved_by")
+        embed.description = " vs ".join(f"<@{u}>" for u in session.players)
+
+        for i, pid in enumerate(session.pids):
+            p = session.problems[i]
+            solved_by = session.solver_label(i)
             if solved_by == "tie":
                 value = f"{p['name']}\n`{pid}`\nTie — no points 🔒 LOCKED"
             elif solved_by:
@@ -440,144 +737,119 @@ def setup(bot: commands.Bot):
             else:
                 link = f"https://codeforces.com/contest/{p['contestId']}/problem/{p['index']}"
                 value = f"[{p['name']}]({link}) — Unsolved"
-            embed.add_field(name=f"Q{i+1} [{session['ratings'][i]}] — {session['points'][i]} pts", value=value, inline=False)
+            embed.add_field(name=_problem_field_name(session, i), value=value, inline=False)
 
-        embed.add_field(name="Final Points", value=f"**{h1}**: {scores[h1]} pts\n**{h2}**: {scores[h2]} pts\n", inline=False)
+        if len(session.players) > 2:
+            # lockout: full standings, best first (points, then earlier to reach them)
+            embed.add_field(
+                name="Standings",
+                value="\n".join(f"**{n}.** `{session.handles[i]}` — {score} pts" for n, (i, score, _) in enumerate(session.ranking(), 1)),
+                inline=False
+            )
+        else:
+            embed.add_field(name="Final Points", value="".join(f"**{h}**: {session.scores[i]} pts\n" for i, h in enumerate(session.handles)), inline=False)
 
-        if scores[h1] > scores[h2]:
-            embed.add_field(name="Winner", value=f"`{h1}`", inline=False)
-        elif scores[h2] > scores[h1]:
-            embed.add_field(name="Winner", value=f"`{h2}`", inline=False)
+        winner, by_tiebreak = session.winner()
+        if winner is None:
+            embed.add_field(name="Result", value="Tie", inline=False)
+        elif by_tiebreak:
+            embed.add_field(name="Tie-break Winner", value=f"`{session.handles[winner]}` (earlier to reach final score)", inline=False)
         else:
-            lt1 = session.get("score_reached", {}).get(h1, {}).get(scores[h1], float("inf"))
-            lt2 = session.get("score_reached", {}).get(h2, {}).get(scores[h2], float("inf"))
-            if lt1 < lt2:
-                embed.add_field(name="Tie-break Winner", value=f"`{h1}` (earlier to reach final score)", inline=False)
-            elif lt2 < lt1:
-                embed.add_field(name="Tie-break Winner", value=f"`{h2}` (earlier to reach final score)", inline=False)
-            else:
-                embed.add_field(name="Result", value="Tie", inline=False)
+            embed.add_field(name="Winner", value=f"`{session.handles[winner]}`", inline=False)
 
-        if channel:
-            await channel.send(embed=embed)
+        rec = _record_recent(session)
+        changes = ladders.record(rec)
+        if changes:
+            embed.add_field(
+                name="Rating",
+                value="\n".join(f"<@{u}>: {before:.0f} → {after:.0f} ({after - before:+.0f})" for u, before, after in changes),
+                inline=False
+            )
 
-        _record_recent(session)
-        # cleanup
-        key_to_remove = next((k for k, v in duel_sessions.items() if v is session), None)
-        if key_to_remove:
-            del duel_sessions[key_to_remove]
+        # queued: several duels ending in one channel go out as one multi-embed message
+        outbox.send(channel, embed=embed)
 
-    async def _update_scores(session):
+        # cleanup first: callbacks may start new duels for these players (next tournament round, queue)
+        key = duel_sessions.remove(session)
+        if key is not None:
+            journal.ended(key)
+        for callback in duel_finished:
+            try:
+                callback(session, rec)
+            except Exception as e:
+                print("❌ Duel finish callback failed:", e)
+
+    async def _update_scores(session, priority=PRIORITY_FINALIZE):
         """
         Silent update: fetch submissions and update session scores & solved set.
-        Returns a list of newly solved info (pid, idx, s1, s2) and ended flag.
+        Returns the award events and ended flag.
         """
-        h1, h2 = session["handles"]
-        pids = session["problems_pids"]
-        scores = session["scores"]
-        score_times = session["score_times"]
-
-        submissions1 = await fetch_submissions(h1)
-        submissions2 = await fetch_submissions(h2)
-        if submissions1 is None or submissions2 is None:
+        fetched_at = time.time()
+        solves = await fetch_duel_solves(session, priority)
+        if solves is None:
             return [], False
+        session.checked_through = max(session.checked_through, fetched_at - FEED_JUDGE_MARGIN)
+        events = _score(session, solves)
+        return events, session.all_solved() or session.is_over()
+
+    async def _after_auto_update(session, events):
+        if events:
+            scoreboard.refresh(session, bot.get_channel(session.channel_id), events, mention=True)
+            session.last_activity = time.time()
+        if (session.all_solved() or session.is_over()) and not session.ended:
+            session.ended = True
+            await _finalize_and_announce(session)
 
-        now = time.time()
-        new_solved = []
+    planner = PollPlanner()
 
-        for idx, pid in enumerate(pids):
-            if session["per_problem"][pid]["solved_by"] is not None:
-                continue
-            s1 = pid in submissions1
-            s2 = pid in submissions2
-            if s1 and not s2:
-                pts = session["points"][idx] if idx < len(session["points"]) else 100*(idx+1)
-                session["per_problem"][pid]["solved_by"] = h1
-                session["per_problem"][pid]["first_time"] = submissions1.get(pid)
-                scores[h1] += pts
-                # record when this player first reached this new total
-                session.setdefault("score_reached", {})
-                session["score_reached"].setdefault(h1, {})
-                session["score_reached"][h1].setdefault(scores[h1], session["per_problem"][pid]["first_time"] or now)
-                score_times.setdefault(h1, now)
-                new_solved.append((pid, idx, True, False))
-            elif s2 and not s1:
-                pts = session["points"][idx] if idx < len(session["points"]) else 100*(idx+1)
-                session["per_problem"][pid]["solved_by"] = h2
-                session["per_problem"][pid]["first_time"] = submissions2.get(pid)
-                scores[h2] += pts
-                session.setdefault("score_reached", {})
-                session["score_reached"].setdefault(h2, {})
-                session["score_reached"][h2].setdefault(scores[h2], session["per_problem"][pid]["first_time"] or now)
-                score_times.setdefault(h2, now)
-                new_solved.append((pid, idx, False, True))
-            elif s1 and s2:
-                # both have ACs: decide via timestamps; award earlier; if equal, mark tie (no points)
-                t1 = submissions1.get(pid)
-                t2 = submissions2.get(pid)
-                if t1 and t2:
-                    if t1 < t2:
-                        pts = session["points"][idx] if idx < len(session["points"]) else 100*(idx+1)
-                        session["per_problem"][pid]["solved_by"] = h1
-                        session["per_problem"][pid]["first_time"] = t1
-                        scores[h1] += pts
-                        session.setdefault("score_reached", {})
-                        session["score_reached"].setdefault(h1, {})
-                        session["score_reached"][h1].setdefault(scores[h1], t1)
-                        score_times.setdefault(h1, now)
-                        new_solved.append((pid, idx, True, False))
-                    elif t2 < t1:
-                        pts = session["points"][idx] if idx < len(session["points"]) else 100*(idx+1)
-                        session["per_problem"][pid]["solved_by"] = h2
-                        session["per_problem"][pid]["first_time"] = t2
-                        scores[h2] += pts
-                        session.setdefault("score_reached", {})
-                        session["score_reached"].setdefault(h2, {})
-                        session["score_reached"][h2].setdefault(scores[h2], t2)
-                        score_times.setdefault(h2, now)
-                        new_solved.append((pid, idx, False, True))
-                    else:
-                        session["per_problem"][pid]["solved_by"] = "tie"
-                        session["per_problem"][pid]["first_time"] = t1
-                        new_solved.append((pid, idx, True, True))
-                else:
-                    # fallback: award both (rare)
-                    pts = session["points"][idx] if idx < len(session["points"]) else 100*(idx+1)
-                    session["per_problem"][pid]["solved_by"] = h1 + "," + h2
-                    session["per_problem"][pid]["first_time"] = now
-                    scores[h1] += pts
-                    scores[h2] += pts
-                    session.setdefault("score_reached", {})
-                    session["score_reached"].setdefault(h1, {})
-                    session["score_reached"].setdefault(h2, {})
-                    session["score_reached"][h1].setdefault(scores[h1], now)
-                    session["score_reached"][h2].setdefault(scores[h2], now)
-                    score_times.setdefault(h1, now)
-                    score_times.setdefault(h2, now)
-                    new_solved.append((pid, idx, True, True))
-
-        # check end
-        ended = False
-        if all(session["per_problem"][pid]["solved_by"] is not None for pid in pids):
-            ended = True
-        elif time.time() - session["start_time"] > session["time_limit"]:
-            ended = True
-
-        return new_solved, ended
+    async def _poll_budget():
+        """Distinct handles the fallback path may fetch per tick: what the live rate limit allows, minus the feed call and queued work."""
+        st = await backend.api_stats()
+        per_tick = int(AUTO_CHECK_INTERVAL / max(st["interval"], 0.1))
+        return max(1, per_tick - 1 - st["queue_depth"])
 
     @tasks.loop(seconds=AUTO_CHECK_INTERVAL)
     async def auto_check_duels():
-        for key, session in list(duel_sessions.items()):
-            if session["ended"]:
+        """
+        One problemset.recentStatus call per tick scores every active duel. Duels the feed window
+        might not fully cover are refreshed through PollPlanner: each distinct handle is fetched once,
+        most urgent duels first, idle duels less often, within the per-tick rate budget.
+        """
+        active = [s for s in duel_sessions.values() if not s.ended]
+        planner.prune(active)
+        if pending_duel_queue:
+            # capacity may have grown since the last finish (spacing relaxed, polling got cheaper)
+            schedule_admission()
+        if not active:
+            return
+        try:
+            hits, stale = await poll_recent_feed(active)
+        except Exception as e:
+            print("❌ Error polling recent status:", e)
+            return
+        for session, maps in hits:
+            try:
+                await _after_auto_update(session, _score(session, maps))
+            except Exception as e:
+                print("❌ Error during auto-check:", e)
+
+        cycle_start = time.time()
+        chosen, _ = planner.plan(stale, await _poll_budget(), cycle_start)
+        # per-handle fetches the due duels needed this tick: the polling cost admission control sizes against
+        pending_duel_queue.observe(sum(len(s.handles) for s in active), planner.demand)
+        for session in chosen:
+            if session.ended:
                 continue
             try:
-                new_solved_info, ended_flag = await _update_scores(session)
-                if new_solved_info:
-                    channel = session.get("channel") or bot.get_channel(session["channel_id"])
-                    await _send_status_embed(session, channel, mention_players=True, new_solved_info=new_solved_info)
-                if ended_flag:
-                    session["ended"] = True
-                    await _finalize_and_announce(session)
+                # a handle shared by several duels is only downloaded for the first of them this cycle
+                open_pids = session.open_pids()
+                maps = [await backend.handle_solves(h, open_pids, AUTO_CHECK_INTERVAL, PRIORITY_BACKGROUND)
+                        for h in session.handles]
+                if any(m is None for m in maps):
+                    continue
+                planner.mark(session, cycle_start)
+                session.checked_through = max(session.checked_through, cycle_start - AUTO_CHECK_INTERVAL - FEED_JUDGE_MARGIN)
+                await _after_auto_update(session, _score(session, maps))
             except Exception as e:
                 print("❌ Error during auto-check:", e)
 
@@ -585,71 +857,69 @@ def setup(bot: commands.Bot):
     async def on_ready():
         print(f"✅ Bot is online as {bot.user}")
 
-        if not duel_timer_watcher.is_running():
-            duel_timer_watcher.start()
-        # Auto-check disabled to make updates manual-only.
-        # If you want auto-check back, uncomment the next two lines.
-        # if not auto_check_duels.is_running():
-        #     auto_check_duels.start()
-
-    @tasks.loop(seconds=5)
-    async def duel_timer_watcher():
-        now = time.time()
-        for key, session in list(duel_sessions.items()):
-            if session["ended"]:
-                continue
+        if not auto_check_duels.is_running():
+            auto_check_duels.start()
+        if _recovered:
+            sessions = _recovered[:]
+            _recovered.clear()
+            bot.loop.create_task(_catch_up(sessions))
+
+    async def _deadline_reached(session):
+        if session.ended:
+            return
+        # _finalize_and_announce performs the final silent update (honoring submission times)
+        session.ended = True
+        await _finalize_and_announce(session)
+
+    deadlines.on_due = _deadline_reached
 
-            if now - session["start_time"] >= session["time_limit"]:
-                # perform a final silent update (honoring submission times) before finalizing
+    async def _catch_up(sessions):
+        """
+        Score ACs made while the bot was down for duels restored from the journal, then re-arm their deadlines
+        (expired ones fire right away and are finalized concurrently).
+        """
+        # expired duels first: their timers fire immediately and finalize concurrently
+        sessions = sorted(sessions, key=lambda s: not s.is_over())
+        for session in sessions:
+            if session.ended:
+                continue
+            if not session.is_over():
                 try:
-                    await _update_scores(session)
+                    solves = await fetch_duel_solves(session, PRIORITY_FINALIZE)
+                    if solves is not None:
+                        await _after_auto_update(session, _score(session, solves))
                 except Exception as e:
-                    print("❌ Final update failed in timer watcher:", e)
-
-                session["ended"] = True
-                await _finalize_and_announce(session)
+                    print("❌ Catch-up scoring failed:", e)
+            key = duel_sessions.key_of(session)
+            if key is not None and not session.ended:
+                deadlines.arm(key, session)
 
     @bot.command()
-    async def recent(ctx):
-        try:
-            with open("recent_duels.json", "r") as f:
-                duels = json.load(f)
-        except FileNotFoundError:
-            await ctx.send("❌ No duel history found.")
-            return
+    async def recent(ctx, member: discord.Member = None):
+        guild_id = ctx.guild.id if ctx.guild else None
+        if member is None:
+            duels = history.store.latest(guild_id)
+            title = "🕒 Recent Duels"
+        else:
+            try:
+                duels = await history.store.for_player(player_id=member.id, guild_id=guild_id)
+            except Exception as e:
+                print("❌ History query failed:", e)
+                await ctx.send("❌ Could not read duel history right now.")
+                return
+            title = f"🕒 Recent Duels — {member.display_name}"
 
         if not duels:
             await ctx.send("📭 No completed duels yet.")
             return
 
         embed = discord.Embed(
-            title="🕒 Recent Duels",
+            title=title,
             color=discord.Color.blurple()
         )
 
-        for d in duels[-20:][::-1]:  # last 20, newest first
-            h1, h2 = d["handles"]
-            s1 = d["scores"].get(h1, 0)
-            s2 = d["scores"].get(h2, 0)
-
-            # Winner logic
-            if s1 > s2:
-                winner = h1
-            elif s2 > s1:
-                winner = h2
-            else:
-                winner = "Draw"
-
-            duration = int(d["end_time"] - d["start_time"])
-
-            embed.add_field(
-                name=f" {h1} vs {h2} ",
-                value=(
-                    f"  **Winner:** {winner}\n"
-                    f"  **Score:** {s1} – {s2}\n"
-                    f"  **Duration:** {duration // 60}m {duration % 60}s"
-                ),
-                inline=False
-            )
+        for d in duels:  # newest first
+            name, value = _recent_field(d)
+            embed.add_field(name=name, value=value, inline=False)
 
         await ctx.send(embed=embed)
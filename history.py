@@ -0,0 +1,179 @@
+# history.py
+import asyncio
+import json
+import os
+import sqlite3
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+HISTORY_DB = os.getenv("DUEL_HISTORY_DB", "duel_history.db")
+LEGACY_RECENT_FILE = "recent_duels.json"
+RECENT_BUFFER = 200   # finished duels kept in memory for !recent
+PLAYER_QUERY_LIMIT = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS duels (
+    id         INTEGER PRIMARY KEY,
+    guild_id   INTEGER,
+    start_time REAL NOT NULL,
+    end_time   REAL NOT NULL,
+    record     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS duel_players (
+    duel_id   INTEGER NOT NULL REFERENCES duels(id),
+    slot      INTEGER NOT NULL,
+    player_id INTEGER,
+    handle    TEXT NOT NULL,   -- lowercased CF handle
+    guild_id  INTEGER,
+    end_time  REAL NOT NULL,
+    score     INTEGER NOT NULL,
+    PRIMARY KEY (duel_id, slot)
+);
+CREATE INDEX IF NOT EXISTS duels_by_time ON duels(end_time);
+CREATE INDEX IF NOT EXISTS duels_by_guild ON duels(guild_id, end_time);
+CREATE INDEX IF NOT EXISTS players_by_handle ON duel_players(handle, end_time);
+CREATE INDEX IF NOT EXISTS players_by_player ON duel_players(player_id, end_time);
+CREATE INDEX IF NOT EXISTS players_by_guild ON duel_players(guild_id, player_id, end_time);
+"""
+
+
+class HistoryStore:
+    """
+    Append-only store of finished duels (SQLite, WAL mode) with indexes on handle, player, guild and time.
+    All database work runs on one dedicated thread so the event loop never waits on disk;
+    the newest RECENT_BUFFER records are also kept in a ring buffer that serves !recent without I/O.
+    """
+
+    def __init__(self, path=HISTORY_DB, buffer_size=RECENT_BUFFER):
+        self.path = path
+        self.recent = deque(maxlen=buffer_size)
+        self._db = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history")
+        self._writes = set()
+
+    # --- database thread ---
+    def _open(self):
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(SCHEMA)
+        self._db = db
+        imported = 0
+        if db.execute("SELECT 1 FROM duels LIMIT 1").fetchone() is None:
+            imported = self._import_legacy()
+        rows = db.execute("SELECT record FROM duels ORDER BY end_time DESC, id DESC LIMIT ?",
+                          (self.recent.maxlen,)).fetchall()
+        return imported, [json.loads(r[0]) for r in reversed(rows)]
+
+    def _import_legacy(self):
+        if not os.path.exists(LEGACY_RECENT_FILE):
+            return 0
+        try:
+            with open(LEGACY_RECENT_FILE, "r") as f:
+                records = json.load(f)
+        except Exception as e:
+            print("⚠️ Could not import legacy duel history:", e)
+            return 0
+        with self._db:
+            for rec in records:
+                self._insert(rec)
+        return len(records)
+
+    def _insert(self, rec):
+        cur = self._db.execute(
+            "INSERT INTO duels (guild_id, start_time, end_time, record) VALUES (?, ?, ?, ?)",
+            (rec.get("guild_id"), rec["start_time"], rec["end_time"], json.dumps(rec)),
+        )
+        duel_id = cur.lastrowid
+        players = rec.get("players") or [None] * len(rec["handles"])
+        self._db.executemany(
+            "INSERT INTO duel_players (duel_id, slot, player_id, handle, guild_id, end_time, score) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(duel_id, i, players[i], h.lower(), rec.get("guild_id"), rec["end_time"], rec["scores"].get(h, 0))
+             for i, h in enumerate(rec["handles"])],
+        )
+
+    def _write(self, rec):
+        with self._db:
+            self._insert(rec)
+
+    def _query_player(self, player_id, handle, guild_id, limit):
+        if player_id is not None:
+            sql, args = "p.player_id = ?", [player_id]
+        else:
+            sql, args = "p.handle = ?", [handle.lower()]
+        if guild_id is not None:
+            sql += " AND (p.guild_id = ? OR p.guild_id IS NULL)"  # NULL: imported pre-guild history
+            args.append(guild_id)
+        rows = self._db.execute(
+            f"SELECT d.record FROM duel_players p JOIN duels d ON d.id = p.duel_id "
+            f"WHERE {sql} ORDER BY p.end_time DESC LIMIT ?",
+            (*args, limit),
+        ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def _close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # --- event loop side ---
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def open(self):
+        imported, records = await self._run(self._open)
+        if imported:
+            print(f"✅ Imported {imported} duels from {LEGACY_RECENT_FILE}")
+        self.recent.extend(records)
+
+    def record(self, rec):
+        """Add a finished duel: visible to !recent immediately, persisted in the background."""
+        self.recent.append(rec)
+        task = asyncio.get_running_loop().create_task(self._persist(rec))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _persist(self, rec):
+        try:
+            await self._run(self._write, rec)
+        except Exception as e:
+            print("❌ Could not save duel history:", e)
+
+    def latest(self, guild_id=None, limit=20):
+        """Newest first, from memory."""
+        out = []
+        for rec in reversed(self.recent):
+            if guild_id is None or rec.get("guild_id") in (guild_id, None):
+                out.append(rec)
+                if len(out) >= limit:
+                    break
+        return out
+
+    async def for_player(self, player_id=None, handle=None, guild_id=None, limit=PLAYER_QUERY_LIMIT):
+        """A player's duels newest first, by discord id or CF handle (index lookup)."""
+        return await self._run(self._query_player, player_id, handle, guild_id, limit)
+
+    async def run(self, fn, *args):
+        """Run fn(db, *args) on the database thread (for modules keeping their own tables here)."""
+        return await self._run(lambda: fn(self._db, *args))
+
+    def submit(self, fn, *args):
+        """Fire-and-forget fn(db, *args) on the database thread, ordered after earlier writes."""
+        task = asyncio.get_running_loop().create_task(self._submit(fn, *args))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _submit(self, fn, *args):
+        try:
+            await self.run(fn, *args)
+        except Exception as e:
+            print("❌ History write failed:", e)
+
+    async def close(self):
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
+
+
+store = HistoryStore()
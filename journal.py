@@ -0,0 +1,193 @@
+# journal.py
+import asyncio
+import json
+import os
+from dataclasses import fields
+from scoring import DuelSession, apply_award
+
+# NOTE: Heroku dyno filesystems are wiped on every deploy/restart cycle; point this at persistent storage there.
+STATE_DIR = os.getenv("DUEL_STATE_DIR", "state")
+COMPACT_OPS = 500        # journal lines before a snapshot is forced
+COMPACT_INTERVAL = 300   # seconds between snapshots while anything changed
+
+_FIELDS = [f.name for f in fields(DuelSession)]
+
+
+def session_state(session: DuelSession) -> dict:
+    state = {name: getattr(session, name) for name in _FIELDS}
+    state["score_reached"] = [{str(k): v for k, v in reached.items()} for reached in session.score_reached]
+    return state
+
+
+def session_from_state(state: dict) -> DuelSession:
+    state = dict(state)
+    state["players"] = tuple(state["players"])
+    state["handles"] = tuple(state["handles"])
+    state["score_reached"] = [{int(k): v for k, v in reached.items()} for reached in state["score_reached"]]
+    state["ended"] = False  # still registered means it was never fully finalized; catch-up will do it
+    return DuelSession(**state)
+
+
+def _dumps(obj):
+    return json.dumps(obj, separators=(",", ":"))
+
+
+class SessionJournal:
+    """
+    Crash-safe record of active duels: every mutation (start, award, end) is appended as one JSON line,
+    and the whole set is periodically compacted into a snapshot. Each line carries a sequence number and
+    the snapshot stores the last one it includes, so replay skips lines the snapshot already covers
+    no matter where a crash interrupted compaction.
+    """
+
+    def __init__(self, directory=STATE_DIR):
+        self.dir = directory
+        self.snapshot_path = os.path.join(directory, "sessions.snapshot.json")
+        self.journal_path = os.path.join(directory, "sessions.journal")
+        self.rotated_path = self.journal_path + ".old"
+        self.seq = 0
+        self._fh = None
+        self._ops = 0
+        self._source = None
+        self._task = None
+        self._lock = asyncio.Lock()
+
+    # --- recovery ---
+    def recover(self):
+        """Rebuild {key: DuelSession} from snapshot + journal, then start a fresh journal."""
+        os.makedirs(self.dir, exist_ok=True)
+        sessions = {}
+        snap_seq = 0
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, "r") as f:
+                    snap = json.load(f)
+                snap_seq = snap["seq"]
+                for item in snap["sessions"]:
+                    sessions[tuple(item["key"])] = session_from_state(item["state"])
+            except Exception as e:
+                print("⚠️ Could not read session snapshot:", e)
+                sessions, snap_seq = {}, 0
+        self.seq = snap_seq
+        for path in (self.rotated_path, self.journal_path):
+            if os.path.exists(path):
+                self._replay(path, sessions, snap_seq)
+
+        # fold everything into a new snapshot so the next run starts from a clean, untorn journal
+        self._write_snapshot(self._snapshot_text(sessions.items()))
+        for path in (self.rotated_path, self.journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._fh = open(self.journal_path, "a")
+        return sessions
+
+    def _replay(self, path, sessions, snap_seq):
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    op = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crash mid-write
+                seq = op.get("seq", 0)
+                if seq <= snap_seq:
+                    continue
+                self.seq = max(self.seq, seq)
+                key = tuple(op["key"])
+                if op["op"] == "start":
+                    sessions[key] = session_from_state(op["state"])
+                elif op["op"] == "award":
+                    session = sessions.get(key)
+                    if session is not None:
+                        for ev in op["events"]:
+                            apply_award(session, *ev)
+                        session.version += 1
+                elif op["op"] == "end":
+                    sessions.pop(key, None)
+
+    # --- appends (event loop; a short buffered write + flush, no fsync) ---
+    def _append(self, op):
+        if self._fh is None:
+            return
+        self.seq += 1
+        op["seq"] = self.seq
+        try:
+            self._fh.write(_dumps(op) + "\n")
+            self._fh.flush()
+        except Exception as e:
+            print("❌ Could not append to session journal:", e)
+        self._ops += 1
+
+    def started(self, key, session):
+        self._append({"op": "start", "key": list(key), "state": session_state(session)})
+
+    def awarded(self, key, events):
+        if events:
+            self._append({"op": "award", "key": list(key), "events": [list(ev) for ev in events]})
+
+    def ended(self, key):
+        self._append({"op": "end", "key": list(key)})
+
+    # --- compaction ---
+    def _snapshot_text(self, items):
+        return _dumps({"seq": self.seq,
+                       "sessions": [{"key": list(k), "state": session_state(s)} for k, s in items]})
+
+    def _write_snapshot(self, text):
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        if os.path.exists(self.rotated_path):
+            os.remove(self.rotated_path)
+
+    async def compact(self):
+        if self._fh is None or self._source is None:
+            return
+        async with self._lock:
+            # rotate and serialize on the loop so the snapshot matches the journal position exactly;
+            # only the disk write happens in a thread
+            self._fh.close()
+            if os.path.exists(self.rotated_path):
+                # the previous snapshot never landed: keep its lines, add ours after them
+                with open(self.journal_path, "r") as src, open(self.rotated_path, "a") as dst:
+                    dst.write(src.read())
+                os.remove(self.journal_path)
+            else:
+                os.replace(self.journal_path, self.rotated_path)
+            self._fh = open(self.journal_path, "a")
+            self._ops = 0
+            text = self._snapshot_text(list(self._source()))
+            try:
+                await asyncio.to_thread(self._write_snapshot, text)
+            except Exception as e:
+                print("⚠️ Could not write session snapshot:", e)
+
+    async def _run(self):
+        waited = 0
+        while True:
+            await asyncio.sleep(5)
+            waited += 5
+            if self._ops >= COMPACT_OPS or (self._ops and waited >= COMPACT_INTERVAL):
+                waited = 0
+                await self.compact()
+
+    def start(self, source):
+        """`source()` yields (key, session) pairs for every active duel."""
+        self._source = source
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._ops:
+            await self.compact()
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+journal = SessionJournal()
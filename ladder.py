@@ -0,0 +1,287 @@
+# ladder.py
+import bisect
+import json
+import time
+import discord
+from discord.ext import commands
+import history
+from scoring import record_ranking
+
+INITIAL_RATING = 1500
+K_FACTOR = 32
+RATING_FLOOR = 0
+RATING_CEIL = 5000
+PAGE_SIZE = 10
+
+LADDER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ratings (
+    guild_id  INTEGER NOT NULL,   -- 0 for duels without a guild
+    player_id INTEGER NOT NULL,
+    handle    TEXT,
+    rating    REAL NOT NULL,
+    games     INTEGER NOT NULL,
+    wins      INTEGER NOT NULL,
+    losses    INTEGER NOT NULL,
+    draws     INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, player_id)
+);
+"""
+
+
+class PlayerRating:
+    __slots__ = ("player_id", "handle", "rating", "games", "wins", "losses", "draws")
+
+    def __init__(self, player_id, handle=None, rating=INITIAL_RATING, games=0, wins=0, losses=0, draws=0):
+        self.player_id = player_id
+        self.handle = handle
+        self.rating = rating
+        self.games = games
+        self.wins = wins
+        self.losses = losses
+        self.draws = draws
+
+    def row(self, guild_key):
+        return (guild_key, self.player_id, self.handle, self.rating, self.games, self.wins, self.losses, self.draws)
+
+
+class RatingIndex:
+    """Fenwick tree counting players per integer rating bucket: O(log n) rank and k-th-from-top queries."""
+
+    def __init__(self, lo=RATING_FLOOR, hi=RATING_CEIL):
+        self.lo = lo
+        self.size = hi - lo + 1
+        self.tree = [0] * (self.size + 1)
+        self.total = 0
+
+    def bucket(self, rating) -> int:
+        return min(max(int(round(rating)), self.lo), self.lo + self.size - 1)
+
+    def add(self, bucket, delta):
+        self.total += delta
+        i = bucket - self.lo + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def count_le(self, bucket) -> int:
+        i = bucket - self.lo + 1
+        n = 0
+        while i > 0:
+            n += self.tree[i]
+            i -= i & -i
+        return n
+
+    def count_above(self, bucket) -> int:
+        return self.total - self.count_le(bucket)
+
+    def kth_from_top(self, k) -> int:
+        """Bucket of the k-th best player (0-based)."""
+        target = self.total - k  # 1-based position counting from the bottom
+        pos = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self.tree[nxt] < target:
+                pos = nxt
+                target -= self.tree[nxt]
+            step >>= 1
+        return pos + self.lo
+
+
+class Ladder:
+    """Ratings of one guild. Players sharing a rating bucket are kept sorted by id for stable paging."""
+
+    def __init__(self):
+        self.players = {}
+        self.index = RatingIndex()
+        self._buckets = {}
+
+    def _place(self, p):
+        b = self.index.bucket(p.rating)
+        bisect.insort(self._buckets.setdefault(b, []), p.player_id)
+        self.index.add(b, 1)
+
+    def _unplace(self, p):
+        b = self.index.bucket(p.rating)
+        members = self._buckets[b]
+        del members[bisect.bisect_left(members, p.player_id)]
+        if not members:
+            del self._buckets[b]
+        self.index.add(b, -1)
+
+    def load(self, p):
+        self.players[p.player_id] = p
+        self._place(p)
+
+    def get(self, player_id, handle=None):
+        p = self.players.get(player_id)
+        if p is None:
+            p = self.players[player_id] = PlayerRating(player_id, handle)
+            self._place(p)
+        elif handle:
+            p.handle = handle
+        return p
+
+    def rank(self, player_id):
+        """(1-based rank, players ranked) or None; players with the same rounded rating share a rank."""
+        p = self.players.get(player_id)
+        if p is None:
+            return None
+        return self.index.count_above(self.index.bucket(p.rating)) + 1, self.index.total
+
+    def page(self, offset, limit=PAGE_SIZE):
+        out = []
+        k = offset
+        while k < min(offset + limit, self.index.total):
+            b = self.index.kth_from_top(k)
+            members = self._buckets[b]
+            start = k - self.index.count_above(b)
+            for pid in members[start:start + (offset + limit - k)]:
+                out.append((k + 1, self.players[pid]))
+                k += 1
+        return out
+
+    def apply(self, a, b, score_a):
+        """Elo update for one game; score_a is 1 / 0.5 / 0 from a's side. O(log n) for the reindex."""
+        expected_a = 1 / (1 + 10 ** ((b.rating - a.rating) / 400))
+        delta = K_FACTOR * (score_a - expected_a)
+        for p, d, s in ((a, delta, score_a), (b, -delta, 1 - score_a)):
+            self._unplace(p)
+            p.rating += d
+            p.games += 1
+            if s == 1:
+                p.wins += 1
+            elif s == 0:
+                p.losses += 1
+            else:
+                p.draws += 1
+            self._place(p)
+        return delta
+
+
+def result_of(rec):
+    """Score of the first player (1 / 0.5 / 0): higher points win, equal points go to whoever reached them first."""
+    (h_top, s_top, t_top), (_, s_next, t_next) = record_ranking(rec)[:2]
+    if s_top == s_next and t_top == t_next:
+        return 0.5
+    return 1.0 if h_top == rec["handles"][0] else 0.0
+
+
+class Ladders:
+    """Per-guild Elo ladders updated from finished-duel records; persisted in the history database."""
+
+    def __init__(self):
+        self.guilds = {}
+
+    def ladder(self, guild_id) -> Ladder:
+        key = guild_id or 0
+        lad = self.guilds.get(key)
+        if lad is None:
+            lad = self.guilds[key] = Ladder()
+        return lad
+
+    def _rate(self, rec):
+        """Apply one record in memory; returns (guild key, [(PlayerRating, old rating)]) or None if not rated."""
+        players = rec.get("players") or []
+        if len(players) != 2 or len(rec.get("handles", ())) != 2 or players[0] == players[1]:
+            return None  # only 1v1 duels are rated
+        lad = self.ladder(rec.get("guild_id"))
+        a = lad.get(players[0], rec["handles"][0])
+        b = lad.get(players[1], rec["handles"][1])
+        old = [(a, a.rating), (b, b.rating)]
+        lad.apply(a, b, result_of(rec))
+        return rec.get("guild_id") or 0, old
+
+    def record(self, rec):
+        """Rate a just-finished duel; the two changed rows are written behind on the history thread."""
+        rated = self._rate(rec)
+        if rated is None:
+            return None
+        guild_key, old = rated
+        rows = [p.row(guild_key) for p, _ in old]
+        history.store.submit(_upsert, rows)
+        return [(p.player_id, before, p.rating) for p, before in old]
+
+    async def load(self):
+        await history.store.run(_create)
+        rows = await history.store.run(_select_all)
+        for guild_key, player_id, handle, rating, games, wins, losses, draws in rows:
+            self.ladder(guild_key).load(PlayerRating(player_id, handle, rating, games, wins, losses, draws))
+
+    async def rebuild(self):
+        """Recompute every ladder from the full duel history in one pass (oldest first)."""
+        started = time.perf_counter()
+        records = await history.store.run(_all_records)
+        self.guilds = {}
+        for rec in records:
+            self._rate(rec)
+        rows = [p.row(g) for g, lad in self.guilds.items() for p in lad.players.values()]
+        await history.store.run(_replace_all, rows)
+        return len(records), time.perf_counter() - started
+
+
+# --- database thread helpers (run through history.store) ---
+def _create(db):
+    db.executescript(LADDER_SCHEMA)
+
+
+def _select_all(db):
+    return db.execute("SELECT guild_id, player_id, handle, rating, games, wins, losses, draws FROM ratings").fetchall()
+
+
+def _upsert(db, rows):
+    with db:
+        db.executemany("INSERT OR REPLACE INTO ratings VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+def _replace_all(db, rows):
+    with db:
+        db.execute("DELETE FROM ratings")
+        db.executemany("INSERT INTO ratings VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+def _all_records(db):
+    return [json.loads(r[0]) for r in db.execute("SELECT record FROM duels ORDER BY end_time, id")]
+
+
+ladders = Ladders()
+
+
+def setup(bot: commands.Bot):
+
+    @bot.command()
+    async def leaderboard(ctx, page: int = 1):
+        lad = ladders.ladder(ctx.guild.id if ctx.guild else None)
+        total = lad.index.total
+        if not total:
+            await ctx.send("📭 No rated duels yet.")
+            return
+        pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+        page = min(max(page, 1), pages)
+        lines = [f"**{r}.** {p.handle or f'<@{p.player_id}>'} — {p.rating:.0f} ({p.wins}W/{p.losses}L/{p.draws}D)"
+                 for r, p in lad.page((page - 1) * PAGE_SIZE)]
+        embed = discord.Embed(title="🏆 Duel Ladder", description="\n".join(lines), color=discord.Color.gold())
+        embed.set_footer(text=f"Page {page}/{pages} • {total} players")
+        await ctx.send(embed=embed)
+
+    @bot.command()
+    async def rank(ctx, member: discord.Member = None):
+        member = member or ctx.author
+        lad = ladders.ladder(ctx.guild.id if ctx.guild else None)
+        r = lad.rank(member.id)
+        if r is None:
+            await ctx.send(embed=discord.Embed(description=f"⚠️ {member.display_name} has no rated duels yet.", color=discord.Color.orange()))
+            return
+        p = lad.players[member.id]
+        embed = discord.Embed(title=f"📈 {member.display_name}", color=discord.Color.gold())
+        embed.add_field(name="Rating", value=f"{p.rating:.0f}", inline=True)
+        embed.add_field(name="Rank", value=f"#{r[0]} of {r[1]}", inline=True)
+        embed.add_field(name="Record", value=f"{p.wins}W / {p.losses}L / {p.draws}D", inline=True)
+        await ctx.send(embed=embed)
+
+    @bot.command(name="rebuildladder")
+    @commands.has_permissions(manage_guild=True)
+    async def rebuild_ladder(ctx):
+        """Admin only: recompute all ratings from the full duel history."""
+        n, took = await ladders.rebuild()
+        await ctx.send(embed=discord.Embed(description=f"✅ Rebuilt ratings from {n} duels in {took:.1f}s.", color=discord.Color.green()))
@@ -0,0 +1,117 @@
+# outbox.py
+import asyncio
+import time
+import discord
+
+CHANNEL_RATE = 5        # messages per channel per CHANNEL_PER seconds (Discord's per-channel send bucket)
+CHANNEL_PER = 5.0
+MAX_EMBEDS = 10         # Discord limits for one message
+MAX_EMBED_CHARS = 6000
+MAX_CONTENT = 2000
+
+
+class TokenBucket:
+    """Local copy of a Discord rate-limit bucket so sends wait here instead of bouncing off a 429."""
+
+    def __init__(self, rate=CHANNEL_RATE, per=CHANNEL_PER):
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+
+    async def take(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) * self.per / self.rate)
+
+
+class _Channel:
+    __slots__ = ("channel", "queue", "bucket", "task")
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.queue = []       # (content, embed, solo, future)
+        self.bucket = TokenBucket()
+        self.task = None
+
+
+class Outbox:
+    """
+    Outbound Discord messages, one FIFO queue and sender task per channel.
+    Announcements queued together are merged into one message (up to 10 embeds / 6000 embed chars),
+    and each channel's send bucket is tracked locally, so bursts wait here instead of hitting 429s.
+    `send` returns a future right away; await it only if you need the posted message.
+    `solo` messages are never merged (e.g. ones that will be edited later with a single embed).
+    """
+
+    def __init__(self):
+        self._channels = {}
+
+    def send(self, channel, content=None, embed=None, solo=False):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        if channel is None:
+            fut.set_result(None)
+            return fut
+        ch = self._channels.get(channel.id)
+        if ch is None:
+            ch = self._channels[channel.id] = _Channel(channel)
+        ch.queue.append((content, embed, solo, fut))
+        if ch.task is None:
+            ch.task = loop.create_task(self._drain(ch))
+        return fut
+
+    def _take_batch(self, ch):
+        batch = [ch.queue.pop(0)]
+        content, embed, solo, _ = batch[0]
+        n_embeds = 1 if embed is not None else 0
+        chars = len(embed) if embed is not None else 0
+        text = len(content or "")
+        while ch.queue and embed is not None and not solo:
+            c, e, s, _ = ch.queue[0]
+            if s or e is None or n_embeds + 1 > MAX_EMBEDS or chars + len(e) > MAX_EMBED_CHARS:
+                break
+            if c and text + len(c) + 1 > MAX_CONTENT:
+                break
+            batch.append(ch.queue.pop(0))
+            n_embeds += 1
+            chars += len(e)
+            text += len(c or "") + 1
+        return batch
+
+    async def _drain(self, ch):
+        try:
+            while ch.queue:
+                batch = self._take_batch(ch)
+                contents = []
+                for c, _, _, _ in batch:
+                    if c and c not in contents:
+                        contents.append(c)
+                embeds = [e for _, e, _, _ in batch if e is not None]
+                await ch.bucket.take()
+                try:
+                    msg = await ch.channel.send(content=" ".join(contents) or None, embeds=embeds)
+                except discord.HTTPException as e:
+                    print("❌ Could not send message:", e)
+                    msg = None
+                for _, _, _, fut in batch:
+                    if not fut.done():
+                        fut.set_result(msg)
+        finally:
+            ch.task = None  # the channel entry (and its bucket state) stays for the next burst
+
+    async def stop(self):
+        """Give queued messages a moment to go out, then drop the rest."""
+        tasks = [ch.task for ch in self._channels.values() if ch.task is not None]
+        if tasks:
+            _, late = await asyncio.wait(tasks, timeout=5)
+            for t in late:
+                t.cancel()
+
+
+outbox = Outbox()
@@ -0,0 +1,72 @@
+# poller.py
+import time
+
+# Per-duel polling cadence for the per-handle fallback path of auto-check
+BASE_POLL_INTERVAL = 10     # seconds; active or nearly finished duels
+MAX_POLL_INTERVAL = 120     # seconds; cap for long-idle duels
+IDLE_AFTER = 300            # seconds without a solve/command before a duel counts as idle
+URGENT_WINDOW = 120         # seconds before the deadline when a duel is always polled at the base rate
+ACTIVITY_WINDOW = 180       # seconds a recent solve/command boosts a duel's priority
+
+
+def session_poll_interval(session, now: float) -> float:
+    """Seconds between polls for this duel: base rate near the deadline or while active, backing off while idle."""
+    time_left = session.end_time - now
+    if time_left <= URGENT_WINDOW:
+        return BASE_POLL_INTERVAL
+    idle = now - session.last_activity
+    if idle < IDLE_AFTER:
+        return BASE_POLL_INTERVAL
+    # double the interval for every further IDLE_AFTER of silence
+    return min(MAX_POLL_INTERVAL, BASE_POLL_INTERVAL * (2 ** int(idle // IDLE_AFTER)))
+
+
+def session_urgency(session, now: float) -> float:
+    """Sort key (lower = poll first): seconds to deadline, halved for recently active duels."""
+    time_left = max(0.0, session.end_time - now)
+    if now - session.last_activity < ACTIVITY_WINDOW:
+        time_left *= 0.5
+    return time_left
+
+
+class PollPlanner:
+    """
+    Decides which duels the auto-check loop refreshes with per-handle fetches this cycle.
+    Handles are deduplicated across duels (a handle in three duels costs one fetch), duels are
+    taken in urgency order, idle duels are skipped until their backed-off interval has passed,
+    and the cycle stops once the distinct handles would exceed the rate budget.
+    """
+
+    def __init__(self):
+        self.last_polled = {}   # id(session) -> time of its last per-handle refresh
+        self.demand = 0         # distinct handles every due duel needed in the last plan (chosen or not)
+
+    def plan(self, sessions, budget: int, now: float | None = None):
+        """
+        Returns (chosen sessions in priority order, distinct lowercase handles they need).
+        At least one due duel is always chosen so nothing starves when the budget is tiny.
+        """
+        now = time.time() if now is None else now
+        due = [s for s in sessions
+               if now - self.last_polled.get(id(s), 0.0) >= session_poll_interval(s, now)]
+        due.sort(key=lambda s: session_urgency(s, now))
+        self.demand = len({h.lower() for s in due for h in s.handles})
+
+        chosen = []
+        handles = set()
+        for s in due:
+            need = {h.lower() for h in s.handles} - handles
+            if chosen and len(handles) + len(need) > budget:
+                continue
+            chosen.append(s)
+            handles |= need
+        return chosen, handles
+
+    def mark(self, session, now: float | None = None):
+        self.last_polled[id(session)] = time.time() if now is None else now
+
+    def prune(self, sessions):
+        alive = {id(s) for s in sessions}
+        for key in list(self.last_polled):
+            if key not in alive:
+                del self.last_polled[key]
@@ -0,0 +1,108 @@
+# problemset.py
+import asyncio
+import json
+import os
+import time
+from cfapi import fetch_problemset, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from catalog import ProblemCatalog
+
+SNAPSHOT_FILE = "problemset.json"
+REFRESH_TTL = 12 * 3600      # seconds between background refreshes (problemset changes a few times a week)
+RETRY_INTERVAL = 10 * 60     # seconds to wait after a failed refresh
+
+
+class ProblemsetStore:
+    """
+    In-memory copy of problemset.problems backed by a local snapshot file.
+    Loaded from disk at startup, refreshed by a background task every `ttl` seconds.
+    A refresh swaps the whole list in one assignment, so readers always see a complete copy;
+    if the API is down the last good copy keeps being served.
+    Each loaded copy also gets a ProblemCatalog (columnar index used for problem selection).
+    """
+
+    def __init__(self, path=SNAPSHOT_FILE, ttl=REFRESH_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.problems = []
+        self.catalog = None
+        self.fetched_at = 0.0
+        self._task = None
+        self._refresh_lock = asyncio.Lock()
+
+    def load_snapshot(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "r") as f:
+                snap = json.load(f)
+        except Exception as e:
+            print("⚠️ Could not read problemset snapshot:", e)
+            return False
+        problems = snap.get("problems") or []
+        if not problems:
+            return False
+        self.catalog = ProblemCatalog(problems)
+        self.problems = problems
+        self.fetched_at = snap.get("fetched_at", 0.0)
+        return True
+
+    def _write_snapshot(self, problems, fetched_at):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"fetched_at": fetched_at, "problems": problems}, f)
+        os.replace(tmp, self.path)
+
+    async def refresh(self, priority: int = PRIORITY_BACKGROUND) -> bool:
+        """Fetch a fresh copy and swap it in. Returns False (keeping the old copy) on API error."""
+        async with self._refresh_lock:
+            if priority == PRIORITY_INTERACTIVE and self.catalog is not None:
+                return True  # another caller loaded it while we waited for the lock
+            problems = await fetch_problemset(priority)
+            if not problems:
+                return False
+            fetched_at = time.time()
+            catalog = await asyncio.to_thread(ProblemCatalog, problems)
+            self.catalog = catalog
+            self.problems = problems
+            self.fetched_at = fetched_at
+            try:
+                await asyncio.to_thread(self._write_snapshot, problems, fetched_at)
+            except Exception as e:
+                print("⚠️ Could not write problemset snapshot:", e)
+            return True
+
+    async def get_catalog(self):
+        """Current ProblemCatalog (None if no problemset could ever be loaded)."""
+        if self.catalog is None:
+            await self.refresh(PRIORITY_INTERACTIVE)
+        return self.catalog
+
+    async def _run(self):
+        while True:
+            due = self.fetched_at + self.ttl - time.time()
+            if due > 0:
+                await asyncio.sleep(due)
+            try:
+                ok = await self.refresh()
+            except Exception as e:
+                print("❌ Problemset refresh failed:", e)
+                ok = False
+            if not ok:
+                await asyncio.sleep(RETRY_INTERVAL)
+
+    def start(self):
+        self.load_snapshot()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+store = ProblemsetStore()
@@ -0,0 +1,119 @@
+# scoreboard.py
+import asyncio
+import time
+import discord
+from outbox import outbox
+
+DEBOUNCE_WINDOW = 3.0  # seconds; at most one Discord write per duel per window
+
+
+class _Board:
+    __slots__ = ("channel", "message", "events", "dirty", "mention", "last_write", "task",
+                 "embed", "embed_version", "written_version", "written_footer")
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.message = None
+        self.events = []
+        self.dirty = False
+        self.mention = False
+        self.last_write = float("-inf")
+        self.task = None
+        self.embed = None
+        self.embed_version = -1
+        self.written_version = -1
+        self.written_footer = None
+
+
+class Scoreboard:
+    """
+    One live status message per duel, edited in place instead of posting a new embed per change.
+    Changes are coalesced: the first one is written right away, anything arriving within DEBOUNCE_WINDOW
+    of a write is folded into a single follow-up edit. The embed is only re-rendered when
+    session.version moves; refreshes of an unchanged duel reuse the cached one with a current footer,
+    and are skipped entirely when that footer would not change either.
+    """
+
+    def __init__(self, render=None, footer=None, debounce=DEBOUNCE_WINDOW):
+        self.render = render  # (session, events) -> discord.Embed
+        self.footer = footer  # session -> footer text that changes over time (time left)
+        self.debounce = debounce
+        self._boards = {}
+
+    def refresh(self, session, channel, events=(), mention=False, force=False):
+        """
+        Schedule a scoreboard write. Without new events or `force`, an unchanged duel is not rewritten.
+        `mention` pings the players, which only happens when a new message has to be posted.
+        """
+        if channel is None or session.ended:
+            return  # a finished duel's results go out with the final announcement
+        board = self._boards.get(session)
+        if board is None:
+            board = self._boards[session] = _Board(channel)
+        board.events.extend(events)
+        board.mention = board.mention or mention
+        if not (events or force or board.message is None) and session.version == board.written_version:
+            return
+        board.dirty = True
+        if board.task is None:
+            board.task = asyncio.get_running_loop().create_task(self._flush(session, board))
+
+    def _embed(self, session, board):
+        if board.events:
+            return self.render(session, board.events)  # new awards always come with a new version
+        if board.embed is None or board.embed_version != session.version:
+            board.embed = self.render(session, ())
+            board.embed_version = session.version
+        embed = board.embed.copy()
+        if self.footer is not None:
+            embed.set_footer(text=self.footer(session))
+        return embed
+
+    async def _flush(self, session, board):
+        try:
+            while board.dirty:
+                delay = board.last_write + self.debounce - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                board.dirty = False
+                await self._write(session, board)
+                board.last_write = time.monotonic()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print("❌ Scoreboard update failed:", e)
+        finally:
+            board.task = None
+
+    async def _write(self, session, board):
+        embed = self._embed(session, board)
+        footer = embed.footer.text
+        unchanged = not board.events and session.version == board.written_version and footer == board.written_footer
+        board.events = []
+        if board.message is not None:
+            if unchanged:
+                return  # nothing visible would change
+            try:
+                await board.message.edit(embed=embed)
+                board.written_version = session.version
+                board.written_footer = footer
+                return
+            except discord.NotFound:
+                board.message = None  # someone deleted it; post a fresh one
+        content = " ".join(f"<@{u}>" for u in session.players) if board.mention else None
+        board.message = await outbox.send(board.channel, content=content, embed=embed, solo=True)
+        board.mention = False
+        board.written_version = session.version
+        board.written_footer = footer
+
+    def close(self, session):
+        """Stop tracking a finished duel (pending edits are dropped; the final results embed replaces them)."""
+        board = self._boards.pop(session, None)
+        if board is not None and board.task is not None:
+            board.task.cancel()
+
+    def __len__(self):
+        return len(self._boards)
+
+
+scoreboard = Scoreboard()
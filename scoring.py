@@ -0,0 +1,179 @@
+# scoring.py
+import time
+from dataclasses import dataclass, field
+
+TIE = -1  # solved_by marker: several players got their first AC in the same second (no points)
+
+
+@dataclass(slots=True, eq=False)
+class DuelSession:
+    """
+    State of one active duel. Per-problem state lives in fixed-size lists indexed by problem slot,
+    per-player state in lists indexed by player slot (same order as `players` / `handles`).
+    """
+    players: tuple            # discord user ids
+    handles: tuple            # CF handles, same order as players
+    problems: list            # CF problem dicts
+    pids: list                # "contestId-index" per slot
+    ratings: list
+    points: list
+    start_time: float
+    time_limit: float
+    channel_id: int
+    guild_id: int | None = None    # None for duels started in DMs
+    end_time: float = 0.0
+    solved_by: list = field(default=None)      # per slot: player index, TIE or None
+    first_time: list = field(default=None)     # per slot: CF time of the deciding AC
+    scores: list = field(default=None)         # per player
+    score_reached: list = field(default=None)  # per player: {total: CF time the total was first reached}
+    ended: bool = False
+    checked_through: float = 0.0   # every AC up to this time has been scored
+    last_activity: float = 0.0
+    version: int = 0               # bumped whenever scoring state changes
+
+    def __post_init__(self):
+        if not self.end_time:
+            self.end_time = self.start_time + self.time_limit
+        n, k = len(self.pids), len(self.handles)
+        if self.solved_by is None:
+            self.solved_by = [None] * n
+        if self.first_time is None:
+            self.first_time = [None] * n
+        if self.scores is None:
+            self.scores = [0] * k
+        if self.score_reached is None:
+            self.score_reached = [{} for _ in range(k)]
+        if not self.checked_through:
+            self.checked_through = self.start_time
+        if not self.last_activity:
+            self.last_activity = self.start_time
+
+    def end_ts(self) -> int:
+        return int(self.end_time)
+
+    def open_pids(self):
+        return [self.pids[i] for i, w in enumerate(self.solved_by) if w is None]
+
+    def all_solved(self) -> bool:
+        return all(w is not None for w in self.solved_by)
+
+    def is_over(self, now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        return now - self.start_time > self.time_limit
+
+    def time_left(self, now: float | None = None) -> float:
+        now = time.time() if now is None else now
+        return self.time_limit - (now - self.start_time)
+
+    def solver_label(self, slot: int):
+        """Handle of the slot's solver, "tie", or None if unsolved."""
+        w = self.solved_by[slot]
+        if w is None:
+            return None
+        return "tie" if w == TIE else self.handles[w]
+
+    def ranking(self):
+        """
+        Player indices best first: higher score, then earlier time of reaching that score
+        (the `score_reached` tie-break). Returns a list of (player index, score, reached time).
+        """
+        rows = [(i, self.scores[i], self.score_reached[i].get(self.scores[i], float("inf")))
+                for i in range(len(self.handles))]
+        rows.sort(key=lambda r: (-r[1], r[2]))
+        return rows
+
+    def winner(self):
+        """(player index or None for a tie, decided_by_tiebreak)."""
+        rows = self.ranking()
+        if len(rows) < 2:
+            return (rows[0][0] if rows else None), False
+        (i, s, t), (_, s2, t2) = rows[0], rows[1]
+        if s > s2:
+            return i, False
+        if t < t2:
+            return i, True
+        return None, False
+
+    def to_record(self, end_time: float | None = None) -> dict:
+        """History record (same shape the recent_duels.json format has always used)."""
+        return {
+            "guild_id": self.guild_id,
+            "players": list(self.players),
+            "handles": list(self.handles),
+            "ratings": list(self.ratings),
+            "points": list(self.points),
+            "scores": {h: self.scores[i] for i, h in enumerate(self.handles)},
+            "score_reached": {h: self.score_reached[i] for i, h in enumerate(self.handles)},
+            "per_problem": {pid: {"solved_by": self.solver_label(s), "first_time": self.first_time[s]}
+                            for s, pid in enumerate(self.pids)},
+            "start_time": self.start_time,
+            "end_time": time.time() if end_time is None else end_time,
+        }
+
+
+def record_ranking(rec):
+    """
+    (handle, score, time that score was reached) best first for a history record, ordered like
+    DuelSession.ranking. Records from before score_reached existed rank equal scores as simultaneous.
+    """
+    reached_all = rec.get("score_reached") or {}
+    rows = []
+    for h in rec["handles"]:
+        score = rec["scores"].get(h, 0)
+        reached = reached_all.get(h) or {}
+        t = reached.get(score, reached.get(str(score)))  # int keys in memory, str keys after JSON
+        rows.append((h, score, float("inf") if t is None else t))
+    rows.sort(key=lambda r: (-r[1], r[2]))
+    return rows
+
+
+def score_solves(session: DuelSession, solved_maps):
+    """
+    The one scoring engine for every caller (!update, auto-check, final scoring).
+    `solved_maps` holds one {pid: first AC time} mapping per player, in player order.
+    For every still-open slot the earliest AC at or before end_time wins the slot's points;
+    a same-second first AC by several players locks the slot as TIE with no points.
+    Awards are applied in AC-time order so `score_reached` records when each total was really reached.
+    Returns award events as (slot, winner index or TIE, points, time) tuples; [] when nothing changed.
+    """
+    end_ts = session.end_ts()
+    decided = []
+    for slot, w in enumerate(session.solved_by):
+        if w is not None:
+            continue
+        pid = session.pids[slot]
+        best_t = None
+        best_i = None
+        for i, solved in enumerate(solved_maps):
+            t = solved.get(pid)
+            if t is None:
+                continue
+            t = int(t)
+            if t > end_ts:
+                continue
+            if best_t is None or t < best_t:
+                best_t, best_i = t, i
+            elif t == best_t:
+                best_i = TIE
+        if best_t is not None:
+            decided.append((best_t, slot, best_i))
+    if not decided:
+        return []
+
+    decided.sort()
+    events = []
+    for t, slot, winner in decided:
+        pts = 0 if winner == TIE else session.points[slot]
+        events.append(apply_award(session, slot, winner, pts, t))
+    session.version += 1
+    return events
+
+
+def apply_award(session: DuelSession, slot: int, winner: int, pts: int, t: int):
+    """Lock one slot for `winner` (or TIE) and credit the points; also used to replay journaled events."""
+    session.solved_by[slot] = winner
+    session.first_time[slot] = t
+    if winner != TIE:
+        session.scores[winner] += pts
+        session.score_reached[winner].setdefault(session.scores[winner], t)
+    return (slot, winner, pts, t)
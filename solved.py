@@ -0,0 +1,122 @@
+# solved.py
+import threading
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+
+class PidTable:
+    """
+    Global append-only interning table: problem id ("contestId-index") -> dense int.
+    Ids never change once assigned, so bitsets built against an older catalog stay valid.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._pids = []
+        self._lock = threading.Lock()  # catalogs are built in a worker thread
+
+    def intern(self, pid: str) -> int:
+        i = self._ids.get(pid)
+        if i is None:
+            with self._lock:
+                i = self._ids.get(pid)
+                if i is None:
+                    i = len(self._pids)
+                    self._pids.append(pid)
+                    self._ids[pid] = i
+        return i
+
+    def lookup(self, pid: str):
+        return self._ids.get(pid)
+
+    def pid(self, i: int) -> str:
+        return self._pids[i]
+
+    def __len__(self):
+        return len(self._pids)
+
+
+pid_table = PidTable()
+
+
+class SolvedSet(Mapping):
+    """
+    Compact pid -> first AC time map.
+    Membership is a bit in `bits` (indexed by pid_table id); the timestamps live in two parallel
+    sorted arrays (ids, times). A typical handle costs a couple of kilobytes instead of a dict of strings.
+    """
+
+    __slots__ = ("bits", "_ids", "_times")
+
+    def __init__(self):
+        self.bits = bytearray()
+        self._ids = array("I")
+        self._times = array("I")
+
+    @classmethod
+    def from_map(cls, solved) -> "SolvedSet":
+        s = cls()
+        s.merge(solved)
+        return s
+
+    def copy(self) -> "SolvedSet":
+        s = SolvedSet()
+        s.bits = bytearray(self.bits)
+        s._ids = array("I", self._ids)
+        s._times = array("I", self._times)
+        return s
+
+    def has_id(self, i: int) -> bool:
+        byte = i >> 3
+        return byte < len(self.bits) and bool(self.bits[byte] & (1 << (i & 7)))
+
+    def _set_bit(self, i: int):
+        byte = i >> 3
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(byte + 1 - len(self.bits)))
+        self.bits[byte] |= 1 << (i & 7)
+
+    def merge(self, solved):
+        """Fold a {pid: first AC time} map in, keeping the earliest time per pid."""
+        fresh = []
+        for pid, t in solved.items():
+            i = pid_table.intern(pid)
+            t = int(t or 0)
+            if self.has_id(i):
+                k = bisect_left(self._ids, i)
+                if t and (not self._times[k] or t < self._times[k]):
+                    self._times[k] = t
+            else:
+                fresh.append((i, t))
+        if not fresh:
+            return
+        for i, _ in fresh:
+            self._set_bit(i)
+        if len(fresh) > 8 or not self._ids:
+            # bulk: rebuild the parallel arrays in one sort
+            pairs = sorted(list(zip(self._ids, self._times)) + fresh)
+            self._ids = array("I", (i for i, _ in pairs))
+            self._times = array("I", (t for _, t in pairs))
+        else:
+            for i, t in fresh:
+                k = bisect_left(self._ids, i)
+                self._ids.insert(k, i)
+                self._times.insert(k, t)
+
+    def __contains__(self, pid) -> bool:
+        i = pid_table.lookup(pid)
+        return i is not None and self.has_id(i)
+
+    def __getitem__(self, pid):
+        i = pid_table.lookup(pid)
+        if i is None or not self.has_id(i):
+            raise KeyError(pid)
+        return self._times[bisect_left(self._ids, i)]
+
+    def __iter__(self):
+        for i in self._ids:
+            yield pid_table.pid(i)
+
+    def __len__(self):
+        return len(self._ids)
@@ -0,0 +1,117 @@
+import asyncio
+import duel
+from admission import AdmissionQueue, PendingDuel
+from backend import backend
+from outbox import outbox
+
+TICK = 10
+
+
+class Session:
+    def __init__(self, end_time, players=2):
+        self.end_time = end_time
+        self.handles = tuple(f"h{i}" for i in range(players))
+
+
+def _entry(*players):
+    return PendingDuel(None, None, players, [f"h{p}" for p in players], [800], {}, 30, f"match {players}", "t")
+
+
+def _measured(cost=0.02, max_duels=200):
+    q = AdmissionQueue(TICK, max_duels)
+    q.handle_cost = cost
+    return q
+
+
+def test_capacity_follows_spacing_and_polling_cost():
+    q = _measured(0.02)
+    # 5 requests per tick at 2s spacing, 20% headroom, minus the feed call: 3 / 0.02
+    assert q.capacity(2.0) == 150
+    assert q.capacity(4.0) == 50
+    assert q.capacity(10.0) == 0
+    for _ in range(50):
+        q.observe(100, 5)
+    assert abs(q.handle_cost - 0.05) < 1e-3
+    assert q.capacity(2.0) == 60
+
+
+def test_admits_until_capacity_then_fifo():
+    q = _measured(0.02)
+    assert q.admits(_entry(1, 2), 148, 74, 2.0)
+    assert not q.admits(_entry(1, 2), 149, 74, 2.0)
+    assert q.push(_entry(1, 2)) == 1
+    assert q.push(_entry(3, 4)) == 2
+    # room again, but the queue goes first
+    assert not q.admits(_entry(5, 6), 0, 0, 2.0)
+    assert q.pop_ready(149, 74, 2.0) is None
+    first = q.pop_ready(147, 73, 2.0)
+    assert first.players == (1, 2)
+    # the starting entry still counts until it has launched
+    assert q.pop_ready(147, 73, 2.0) is None
+    q.started(first)
+    assert q.pop_ready(147, 73, 2.0).players == (3, 4)
+
+
+def test_hard_cap_and_empty_budget():
+    q = _measured(0.02, max_duels=3)
+    assert not q.admits(_entry(1, 2), 6, 3, 2.0)
+    # with nothing running one request is admitted even when the budget is gone
+    assert q.admits(_entry(1, 2), 0, 0, 10.0)
+    assert not q.admits(_entry(1, 2), 2, 1, 10.0)
+
+
+def test_eta_waits_for_enough_duels_to_end():
+    q = _measured(0.02)
+    sessions = [Session(1000 + 60 * i) for i in range(75)]
+    q.push(_entry(1, 2))
+    q.push(_entry(3, 4, 5))
+    # capacity 150 handles, 150 in use: the first needs one duel to end, both together need three
+    assert q.eta(1, sessions, 150, 75, 2.0, now=900) == 100
+    assert q.eta(2, sessions, 150, 75, 2.0, now=900) == 220
+    assert q.eta(1, sessions, 100, 50, 2.0, now=900) == 0
+
+
+def test_drop_players_and_positions():
+    q = _measured()
+    q.push(_entry(1, 2))
+    q.push(_entry(3, 4, 5))
+    q.push(_entry(6, 7))
+    assert q.position_of(4) == 2
+    assert [e.players for e in q.drop_players([5, 7])] == [(3, 4, 5), (6, 7)]
+    assert q.position_of(4) is None
+    assert [e.players for e in q] == [(1, 2)]
+
+
+class Ctx:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, embed=None):
+        self.sent.append(embed)
+
+
+class Stats:
+    async def api_stats(self):
+        return {"interval": 2.0}
+
+
+def test_new_request_replaces_queued_one(monkeypatch):
+    q = _measured(0.02)
+    monkeypatch.setattr(duel, "pending_duel_queue", q)
+    monkeypatch.setattr(backend, "impl", Stats())
+    monkeypatch.setattr(duel, "_active_load", lambda: (149, 74))
+    notices = []
+    monkeypatch.setattr(outbox, "send", lambda channel, embed=None, **kw: notices.append(embed.description))
+
+    async def run():
+        ctx = Ctx()
+        assert not await duel.admit_or_queue(ctx, _entry(3, 4))
+        assert q.position_of(3) == 1
+        # the same player asks for a different match: the queued one is dropped, the new one queued
+        assert not await duel.admit_or_queue(ctx, _entry(3, 9))
+        return ctx
+
+    ctx = asyncio.run(run())
+    assert [e.players for e in q] == [(3, 9)]
+    assert len(notices) == 1 and "dropped" in notices[0]
+    assert [e.title for e in ctx.sent] == ["⏳ Duel Queued", "⏳ Duel Queued"]
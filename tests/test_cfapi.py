@@ -0,0 +1,62 @@
+import asyncio
+import cfapi
+
+
+def _sub(sid, pid, verdict, t=None):
+    cid, index = pid.split("-")
+    sub = {"id": sid, "problem": {"contestId": int(cid), "index": index}, "creationTimeSeconds": t or 1000 + sid}
+    if verdict is not None:
+        sub["verdict"] = verdict
+    return sub
+
+
+def _stub_user_status(monkeypatch, history):
+    """Serve user.status from `history` (newest first), decoded by the caller's decoder like the real stream."""
+    async def fake_call(method, params=None, priority=0, decode=None):
+        assert method == "user.status"
+        subs = sorted(history, key=lambda s: -s["id"])
+        if "from" in params:
+            start = params["from"] - 1
+            subs = subs[start:start + params["count"]]
+        page = decode.new_page()
+        decode.feed(page, subs)
+        return page
+
+    monkeypatch.setattr(cfapi, "_call", fake_call)
+    monkeypatch.setattr(cfapi, "submission_cache", cfapi.SubmissionCache())
+
+
+def test_submission_judged_after_refresh_is_merged(monkeypatch):
+    history = [_sub(1, "1-A", "OK"), _sub(2, "2-B", "TESTING"), _sub(3, "3-C", None)]
+    _stub_user_status(monkeypatch, history)
+
+    async def run():
+        first = await cfapi.fetch_submissions("someone")
+        assert "1-A" in first and "2-B" not in first and "3-C" not in first
+        # both get judged OK before the next (incremental) refresh
+        history[1]["verdict"] = "OK"
+        history[2]["verdict"] = "OK"
+        second = await cfapi.fetch_submissions("someone")
+        assert "2-B" in second and "3-C" in second
+        assert await cfapi.fetch_solves("someone", ["2-B", "3-C"]) == {"2-B": 1002, "3-C": 1003}
+
+    asyncio.run(run())
+
+
+def test_incremental_refresh_waits_for_pending_submission(monkeypatch):
+    history = [_sub(1, "1-A", "OK")]
+    _stub_user_status(monkeypatch, history)
+
+    async def run():
+        await cfapi.fetch_submissions("someone")
+        history.append(_sub(2, "2-B", "TESTING"))
+        history.append(_sub(3, "3-C", "WRONG_ANSWER"))
+        solved = await cfapi.fetch_submissions("someone")
+        assert "2-B" not in solved
+        assert cfapi.submission_cache.peek("someone").last_id == 1
+        history[1]["verdict"] = "OK"
+        solved = await cfapi.fetch_submissions("someone")
+        assert "2-B" in solved
+        assert cfapi.submission_cache.peek("someone").last_id == 3
+
+    asyncio.run(run())
@@ -0,0 +1,36 @@
+import asyncio
+import json
+from cflink import HandleRegistry
+
+
+def _legacy_registry(tmp_path):
+    path = tmp_path / "handles.json"
+    path.write_text(json.dumps({"42": "Tourist"}))
+    registry = HandleRegistry(str(path))
+    registry.load()
+    return registry
+
+
+def test_guild_unlink_keeps_global_link(tmp_path):
+    registry = _legacy_registry(tmp_path)
+    guild_a, guild_b = 1001, 1002
+    assert registry.get(42, guild_a) == "Tourist"
+    assert registry.unlink(42, guild_b) is None
+    assert registry.get(42, guild_a) == "Tourist"
+    assert registry.get(42, guild_b) == "Tourist"
+
+
+def test_guild_link_shadows_and_unlinks_only_locally(tmp_path):
+    registry = _legacy_registry(tmp_path)
+
+    async def run():
+        assert registry.link(42, "tourist_alt", 1001)
+        assert registry.get(42, 1001) == "tourist_alt"
+        assert registry.unlink(42, 1001) == "tourist_alt"
+        assert registry.get(42, 1001) == "Tourist"
+        assert registry.unlink(42, None) == "Tourist"
+        assert registry.get(42, 1001) is None
+        await registry.stop()
+
+    asyncio.run(run())
+    assert json.loads((tmp_path / "handles.json").read_text()) == {"guilds": {}}
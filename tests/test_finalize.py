@@ -0,0 +1,73 @@
+import asyncio
+import time
+import discord
+from discord.ext import commands
+import duel
+import history
+from backend import backend
+from deadlines import deadlines
+from duel import duel_sessions, launch_duel
+from ladder import ladders
+from scoreboard import scoreboard
+
+
+class FakeChannel:
+    id = 4321
+
+    async def send(self, content=None, embed=None, embeds=None):
+        pass
+
+
+class FakeCtx:
+    def __init__(self, user_id, channel):
+        self.author = type("Author", (), {"id": user_id})()
+        self.channel = channel
+
+    async def send(self, content=None, embed=None):
+        pass
+
+
+class SlowSolves:
+    """Every fetch waits for `release`, then reports a solve made before the deadline."""
+
+    def __init__(self, solved_at):
+        self.release = asyncio.Event()
+        self.solved_at = solved_at
+
+    async def problem_solves(self, handle, pids, priority=None):
+        await self.release.wait()
+        return {pid: self.solved_at for pid in pids[:1]} if handle == "alice" else {}
+
+
+def test_update_racing_the_deadline_finalizes_once(monkeypatch):
+    records = []
+    monkeypatch.setattr(duel, "duel_finished", [])
+    monkeypatch.setattr(history.store, "record", records.append)
+    monkeypatch.setattr(history.store, "submit", lambda fn, *args: None)
+    bot = commands.Bot(command_prefix="!", intents=discord.Intents.default())
+    duel.setup(bot)
+    channel = FakeChannel()
+    problems = [{"contestId": 1, "index": "A", "name": "A"}, {"contestId": 2, "index": "B", "name": "B"}]
+
+    async def run():
+        fake = SlowSolves(time.time() - 60)
+        monkeypatch.setattr(backend, "impl", fake)
+        session = launch_duel(channel, 77, (1, 2), ("alice", "bob"), problems, [800, 900], 30)
+        # the clock has just run out while a player's !update is still fetching
+        session.start_time -= session.time_limit
+        session.end_time = time.time()
+        update = asyncio.create_task(bot.get_command("update").callback(FakeCtx(1, channel)))
+        await asyncio.sleep(0)
+        finalize = asyncio.create_task(deadlines.on_due(session))
+        await asyncio.sleep(0)
+        fake.release.set()
+        await asyncio.gather(update, finalize)
+        await deadlines.stop()
+        return session
+
+    session = asyncio.run(run())
+    assert len(records) == 1
+    assert records[0]["scores"]["alice"] == 100
+    assert duel_sessions.key_of(session) is None
+    assert session not in scoreboard._boards
+    assert ladders.ladder(77).players[1].games == 1
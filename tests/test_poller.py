@@ -0,0 +1,62 @@
+import random
+from poller import (PollPlanner, session_poll_interval, BASE_POLL_INTERVAL, MAX_POLL_INTERVAL,
+                    IDLE_AFTER, URGENT_WINDOW)
+
+NOW = 1_000_000.0
+
+
+class Session:
+    def __init__(self, handles, end_time, last_activity):
+        self.handles = tuple(handles)
+        self.end_time = end_time
+        self.last_activity = last_activity
+
+
+def test_plan_never_exceeds_budget():
+    rng = random.Random(7)
+    pool = [f"h{i}" for i in range(40)]
+    for _ in range(300):
+        sessions = [Session(rng.sample(pool, rng.randint(2, 8)), NOW + rng.randint(0, 3600), NOW - rng.randint(0, 900))
+                    for _ in range(rng.randint(1, 30))]
+        budget = rng.randint(1, 25)
+        chosen, handles = PollPlanner().plan(sessions, budget, NOW)
+        assert handles == {h.lower() for s in chosen for h in s.handles}
+        # the only allowed overrun is a single duel bigger than the whole budget
+        assert len(handles) <= budget or len(chosen) == 1
+        assert chosen or not sessions
+
+
+def test_shared_handles_are_counted_once():
+    a = Session(["x", "y"], NOW + 600, NOW)
+    b = Session(["Y", "z"], NOW + 700, NOW)
+    chosen, handles = PollPlanner().plan([a, b], 3, NOW)
+    assert chosen == [a, b]
+    assert handles == {"x", "y", "z"}
+
+
+def test_idle_backoff_grows_to_the_cap():
+    s = Session(["x", "y"], NOW + 10_000, NOW)
+    intervals = [session_poll_interval(s, NOW + k * IDLE_AFTER) for k in range(8)]
+    assert intervals[0] == BASE_POLL_INTERVAL
+    assert intervals == sorted(intervals)
+    assert intervals[-1] == MAX_POLL_INTERVAL
+
+
+def test_backoff_resets_on_activity_and_near_the_deadline():
+    s = Session(["x", "y"], NOW + 10_000, NOW - 3 * IDLE_AFTER)
+    assert session_poll_interval(s, NOW) > BASE_POLL_INTERVAL
+    s.last_activity = NOW  # a solve or command
+    assert session_poll_interval(s, NOW) == BASE_POLL_INTERVAL
+    idle_late = Session(["x", "y"], NOW + URGENT_WINDOW - 1, NOW - 3 * IDLE_AFTER)
+    assert session_poll_interval(idle_late, NOW) == BASE_POLL_INTERVAL
+
+
+def test_polled_duel_waits_for_its_interval():
+    planner = PollPlanner()
+    s = Session(["x", "y"], NOW + 10_000, NOW - 2 * IDLE_AFTER)
+    interval = session_poll_interval(s, NOW)
+    planner.mark(s, NOW)
+    assert planner.plan([s], 10, NOW + interval - 1)[0] == []
+    assert planner.plan([s], 10, NOW + interval)[0] == [s]
+    planner.prune([])
+    assert planner.last_polled == {}
@@ -0,0 +1,76 @@
+import random
+from scoring import DuelSession, score_solves, TIE
+
+START = 1_000_000
+
+
+def _session(n_players=2, n_problems=3, minutes=30):
+    return DuelSession(
+        players=tuple(range(1, n_players + 1)),
+        handles=tuple(f"h{i}" for i in range(n_players)),
+        problems=[{} for _ in range(n_problems)],
+        pids=[f"{100 + i}-A" for i in range(n_problems)],
+        ratings=[800] * n_problems,
+        points=[100 * (i + 1) for i in range(n_problems)],
+        start_time=START,
+        time_limit=minutes * 60,
+        channel_id=1,
+    )
+
+
+def test_same_second_first_ac_is_a_tie():
+    s = _session()
+    events = score_solves(s, ({"100-A": START + 60}, {"100-A": START + 60}))
+    assert events == [(0, TIE, 0, START + 60)]
+    assert s.solver_label(0) == "tie"
+    assert s.scores == [0, 0]
+    # a locked slot is never re-awarded
+    assert score_solves(s, ({"100-A": START + 10}, {})) == []
+
+
+def test_solves_after_end_time_are_ignored():
+    s = _session(minutes=10)
+    end = int(s.end_time)
+    events = score_solves(s, ({"100-A": end + 1, "101-A": end}, {"100-A": end + 5}))
+    assert events == [(1, 0, 200, end)]
+    assert s.solved_by == [None, 0, None]
+    assert s.scores == [200, 0]
+
+
+def test_earliest_ac_wins():
+    s = _session(n_players=3)
+    events = score_solves(s, ({"100-A": START + 300}, {"100-A": START + 120}, {"100-A": START + 200}))
+    assert events == [(0, 1, 100, START + 120)]
+    assert s.solver_label(0) == "h1"
+    assert s.scores == [0, 100, 0]
+
+
+def test_awards_apply_in_ac_time_order():
+    s = _session()
+    score_solves(s, ({"102-A": START + 50, "100-A": START + 500}, {}))
+    assert s.score_reached[0] == {300: START + 50, 400: START + 500}
+
+
+def test_lockout_properties_hold_for_random_n_player_solves():
+    rng = random.Random(20261016)
+    for _ in range(200):
+        n = rng.randint(3, 8)
+        s = _session(n_players=n, n_problems=rng.randint(1, 6), minutes=20)
+        end = int(s.end_time)
+        maps = tuple({pid: START + rng.randint(0, 1500) for pid in s.pids if rng.random() < 0.4} for _ in range(n))
+        events = score_solves(s, maps)
+        for slot, pid in enumerate(s.pids):
+            times = [(m[pid], i) for i, m in enumerate(maps) if pid in m and m[pid] <= end]
+            if not times:
+                assert s.solved_by[slot] is None
+                continue
+            best = min(t for t, _ in times)
+            firsts = [i for t, i in times if t == best]
+            assert s.solved_by[slot] == (firsts[0] if len(firsts) == 1 else TIE)
+            assert s.first_time[slot] == best
+        assert sum(s.scores) == sum(pts for _, winner, pts, _ in events if winner != TIE)
+        assert [t for *_, t in events] == sorted(t for *_, t in events)
+        # scoring is idempotent: the same maps change nothing the second time
+        version = s.version
+        assert score_solves(s, maps) == []
+        assert s.version == version
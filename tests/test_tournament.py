@@ -0,0 +1,60 @@
+import asyncio
+import discord
+from discord.ext import commands
+import duel
+import history
+import tournament
+from backend import backend
+from deadlines import deadlines
+from duel import duel_sessions
+
+
+class FakeChannel:
+    id = 1234
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, content=None, embed=None, embeds=None):
+        self.sent.append(embed or embeds or content)
+
+
+class NoSolves:
+    async def problem_solves(self, handle, pids, priority=None):
+        return {}
+
+
+def _problems(n):
+    return [{"contestId": 1000 + n, "index": chr(ord("A") + i), "name": f"P{n}{i}"} for i in range(2)]
+
+
+def test_round_robin_plays_every_round(monkeypatch):
+    monkeypatch.setattr(duel, "duel_finished", [])
+    monkeypatch.setattr(backend, "impl", NoSolves())
+    monkeypatch.setattr(history.store, "record", lambda rec: None)
+    monkeypatch.setattr(history.store, "submit", lambda fn, *args: None)
+    bot = commands.Bot(command_prefix="!", intents=discord.Intents.default())
+    duel.setup(bot)
+    tournament.setup(bot)
+
+    players = [11, 12, 13, 14]
+    rounds = tournament.round_robin(len(players))
+    pairings = [pair for rnd in rounds for pair in rnd]
+    channel = FakeChannel()
+    t = tournament.Tournament(channel, None, players, [f"h{p}" for p in players], [800, 900], 30, rounds,
+                              {pair: _problems(n) for n, pair in enumerate(pairings)})
+    tournament.tournaments[channel.id] = t
+
+    async def run():
+        assert t.launch_next_round()
+        # every duel runs out its clock; finishing a round's last duel launches the next round
+        while duel_sessions:
+            for session in list(duel_sessions.values()):
+                await deadlines.on_due(session)
+        await deadlines.stop()
+
+    asyncio.run(run())
+    assert t.skipped == []
+    assert t.round == len(rounds) - 1
+    assert t.played == [len(players) - 1] * len(players)
+    assert channel.id not in tournament.tournaments
@@ -0,0 +1,192 @@
+# tournament.py
+import discord
+from discord.ext import commands
+from cflink import get_handle
+from backend import backend
+import duel
+from duel import duel_sessions, launch_duel, MAX_ACTIVE_DUELS
+from ladder import result_of
+from outbox import outbox
+
+MIN_PLAYERS = 3
+MAX_PLAYERS = 16
+
+
+def round_robin(n):
+    """Circle-method schedule: rounds of (i, j) index pairs in which everyone meets everyone exactly once."""
+    idx = list(range(n)) + ([None] if n % 2 else [])
+    m = len(idx)
+    rounds = []
+    for _ in range(m - 1):
+        pairs = [(idx[k], idx[m - 1 - k]) for k in range(m // 2)]
+        rounds.append([(a, b) for a, b in pairs if a is not None and b is not None])
+        idx = [idx[0], idx[-1]] + idx[1:-1]
+    return rounds
+
+
+class Tournament:
+    """
+    Round-robin between registered players in one channel. Every pairing's problem set is chosen up front
+    (disjoint across the whole tournament); rounds launch one after another, since a player can only be
+    in one duel at a time.
+    """
+
+    def __init__(self, channel, guild_id, players, handles, ratings_list, time_min, rounds, problem_sets):
+        self.channel = channel
+        self.guild_id = guild_id
+        self.players = players
+        self.handles = handles
+        self.ratings_list = ratings_list
+        self.time_min = time_min
+        self.rounds = rounds
+        self.problem_sets = problem_sets  # (i, j) -> problems
+        self.round = -1
+        self.live = {}                    # id(session) -> (i, j)
+        self.points = [0.0] * len(players)
+        self.played = [0] * len(players)
+        self.skipped = []
+        self.cancelled = False
+
+    def launch_next_round(self):
+        """Start the next round's duels (skipping pairings with a busy player). False when no rounds are left."""
+        while not self.cancelled and self.round + 1 < len(self.rounds):
+            self.round += 1
+            for i, j in self.rounds[self.round]:
+                a, b = self.players[i], self.players[j]
+                if duel_sessions.is_busy(a) or duel_sessions.is_busy(b) or len(duel_sessions) >= MAX_ACTIVE_DUELS:
+                    self.skipped.append((i, j))
+                    continue
+                try:
+                    session = launch_duel(self.channel, self.guild_id, (a, b), (self.handles[i], self.handles[j]),
+                                          self.problem_sets[(i, j)], self.ratings_list, self.time_min,
+                                          title=f"🏟️ Tournament — Round {self.round + 1}/{len(self.rounds)}")
+                except ValueError:
+                    self.skipped.append((i, j))
+                    continue
+                self.live[id(session)] = (i, j)
+                _by_session[id(session)] = self
+            if self.live:
+                return True
+        return False
+
+    def finished(self, session, rec):
+        i, j = self.live.pop(id(session))
+        s = result_of(rec)
+        self.points[i] += s
+        self.points[j] += 1 - s
+        self.played[i] += 1
+        self.played[j] += 1
+        return not self.live
+
+    def standings_embed(self, title):
+        order = sorted(range(len(self.players)), key=lambda k: (-self.points[k], self.handles[k].lower()))
+        lines = [f"**{n}.** <@{self.players[k]}> (`{self.handles[k]}`) — {self.points[k]:g} pts in {self.played[k]} games"
+                 for n, k in enumerate(order, 1)]
+        embed = discord.Embed(title=title, description="\n".join(lines), color=discord.Color.gold())
+        if self.skipped:
+            embed.add_field(name="Not played", value=", ".join(f"`{self.handles[i]}` vs `{self.handles[j]}`" for i, j in self.skipped), inline=False)
+        embed.set_footer(text=f"Round {max(self.round + 1, 0)}/{len(self.rounds)} • win 1, draw ½")
+        return embed
+
+
+tournaments = {}   # channel id -> Tournament
+_by_session = {}   # id(session) -> Tournament
+
+
+def _on_duel_finished(session, rec):
+    t = _by_session.pop(id(session), None)
+    if t is None:
+        return
+    if not t.finished(session, rec) or t.cancelled:
+        return
+    if not t.launch_next_round():
+        tournaments.pop(t.channel.id, None)
+        outbox.send(t.channel, embed=t.standings_embed("🏆 Tournament Finished — Final Standings"))
+
+
+def setup(bot: commands.Bot):
+    duel.duel_finished.append(_on_duel_finished)
+
+    @bot.command()
+    async def tournament(ctx, *args):
+        """
+        Round-robin tournament:
+        - !tournament @p1 @p2 @p3 ... [base_rating time_min | min max num time_min] [+tag -tag contest:LO-HI]
+        - !tournament status | !tournament cancel
+        """
+        current = tournaments.get(ctx.channel.id)
+        if args and args[0] in ("status", "cancel"):
+            if current is None:
+                await ctx.send(embed=discord.Embed(description="⚠️ No tournament is running in this channel.", color=discord.Color.orange()))
+                return
+            if args[0] == "cancel":
+                perms = getattr(ctx.author, "guild_permissions", None)
+                if perms is None or not perms.manage_guild:
+                    await ctx.send(embed=discord.Embed(description="❌ You need Manage Server permission to cancel a tournament.", color=discord.Color.red()))
+                    return
+                current.cancelled = True
+                tournaments.pop(ctx.channel.id, None)
+                await ctx.send(embed=current.standings_embed("🛑 Tournament Cancelled — Standings (running duels still finish)"))
+                return
+            await ctx.send(embed=current.standings_embed("📋 Tournament Standings"))
+            return
+        if current is not None:
+            await ctx.send(embed=discord.Embed(description="❌ A tournament is already running in this channel.", color=discord.Color.red()))
+            return
+
+        members = list(dict.fromkeys(ctx.message.mentions))
+        if not MIN_PLAYERS <= len(members) <= MAX_PLAYERS:
+            await ctx.send(embed=discord.Embed(description=f"❌ Mention between {MIN_PLAYERS} and {MAX_PLAYERS} players.", color=discord.Color.red()))
+            return
+        tail = [tok for tok in ctx.message.content.split()[1:] if not tok.startswith("<@")]
+        try:
+            tail, filters = duel._parse_filters(tail)
+            ratings_list, time_min = duel._parse_ratings(tail)
+        except ValueError as e:
+            await ctx.send(embed=discord.Embed(description=f"❌ {e}", color=discord.Color.red()))
+            return
+
+        guild_id = ctx.guild.id if ctx.guild else None
+        handles = [get_handle(m.id, guild_id) for m in members]
+        missing = [m for m, h in zip(members, handles) if not h]
+        if missing:
+            names = ", ".join(f"`{m.display_name}`" for m in missing)
+            await ctx.send(embed=discord.Embed(description=f"❌ No registered handle for {names}.", color=discord.Color.orange()))
+            return
+        busy = [m for m in members if duel_sessions.is_busy(m.id)]
+        if busy:
+            names = ", ".join(f"`{m.display_name}`" for m in busy)
+            await ctx.send(embed=discord.Embed(description=f"❌ {names} already in an active duel.", color=discord.Color.red()))
+            return
+
+        unknown = await backend.unknown_tags(filters["required_tags"] + filters["forbidden_tags"])
+        if unknown:
+            await ctx.send(embed=discord.Embed(description=f"❌ Unknown tag(s): {', '.join(f'`{t}`' for t in unknown)}", color=discord.Color.red()))
+            return
+
+        rounds = round_robin(len(members))
+        pairings = [pair for rnd in rounds for pair in rnd]
+        await ctx.send(embed=discord.Embed(
+            description=f"🔍 Fetching {len(members)} players' solves and picking problems for {len(pairings)} pairings ...",
+            color=discord.Color.blue()))
+        # one solved-set fetch per player, one selection pass for every pairing
+        await backend.touch_handles(handles)
+        sets = await backend.select_batch(handles, pairings, ratings_list, filters, duel.SOLVED_MAX_AGE)
+        if sets is None:
+            reason = await backend.unavailable_reason() or "Could not fetch submissions from Codeforces now"
+            await ctx.send(embed=discord.Embed(description=f"⚠️ {reason}. Try again later.", color=discord.Color.orange()))
+            return
+        if any(s is None for s in sets):
+            await ctx.send(embed=discord.Embed(description="❌ Not enough unsolved problems for every pairing. Try fewer players or looser filters.", color=discord.Color.red()))
+            return
+
+        t = Tournament(ctx.channel, guild_id, [m.id for m in members], handles,
+                       ratings_list, time_min, rounds, dict(zip(pairings, sets)))
+        tournaments[ctx.channel.id] = t
+        await ctx.send(embed=discord.Embed(
+            title="🏟️ Tournament Started",
+            description=f"{len(members)} players, {len(rounds)} rounds of {time_min} minutes, {len(pairings)} duels.",
+            color=discord.Color.green()))
+        if not t.launch_next_round():
+            tournaments.pop(ctx.channel.id, None)
+            await ctx.send(embed=t.standings_embed("🏆 Tournament Finished — Final Standings"))
@@ -0,0 +1,107 @@
+# warmer.py
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from cfapi import (fetch_submissions, submission_cache, scheduler, CFError, CFHandleNotFound,
+                   PRIORITY_BACKGROUND, SUBMISSION_CACHE_SIZE)
+
+WARM_TICK = 1.0                # seconds between checks for spare capacity
+ACTIVE_WINDOW = 2 * 86400      # handles used within this window count as active
+ACTIVE_REFRESH = 10 * 60       # keep active handles at most this stale
+IDLE_REFRESH = 2 * 3600        # everyone else
+RETRY_AFTER = 5 * 60           # after a failed refresh
+RESCAN_AFTER = 60              # longest a quiet warmer skips scanning (an evicted entry can fall due early)
+
+
+class CacheWarmer:
+    """
+    Keeps the solved-set cache fresh for registered handles using only spare rate-limit capacity:
+    a refresh is issued only while the request scheduler has nothing queued, one at a time, at background
+    priority. Recently active handles are refreshed more often and go first; only as many handles as
+    the cache can hold are kept warm, so warming never evicts itself. Handles are kept in activity
+    order as they are touched, and after a scan that finds nothing due the warmer stays quiet until
+    the earliest due time, so a tick is O(1) however many handles are registered.
+    """
+
+    def __init__(self):
+        self.handles = {}      # lowercase handle -> handle
+        self.active = {}       # lowercase handle -> last time it was used in a duel/registration
+        self.order = OrderedDict()  # lowercase handles, least recently active first
+        self._tried = {}       # lowercase handle -> last refresh attempt
+        self._quiet_until = 0.0
+        self._task = None
+
+    def set_handles(self, handles):
+        self.handles = {h.lower(): h for h in handles}
+        # the only full sort (startup, unregister); touch() keeps the order afterwards
+        self.order = OrderedDict.fromkeys(sorted(self.handles, key=lambda k: self.active.get(k, 0)))
+        self._quiet_until = 0.0
+
+    def touch(self, handles):
+        now = time.time()
+        for h in handles:
+            key = h.lower()
+            self.handles.setdefault(key, h)
+            self.active[key] = now
+            self.order[key] = None
+            self.order.move_to_end(key)
+        self._quiet_until = 0.0
+
+    def _interval(self, key, now):
+        return ACTIVE_REFRESH if now - self.active.get(key, 0) <= ACTIVE_WINDOW else IDLE_REFRESH
+
+    def next_due(self, now=None):
+        """Most recently active handle whose cache entry is older than its refresh interval, or None."""
+        now = time.time() if now is None else now
+        if now < self._quiet_until:
+            return None
+        soonest = now + RESCAN_AFTER
+        for key in itertools.islice(reversed(self.order), SUBMISSION_CACHE_SIZE):
+            entry = submission_cache.peek(key)
+            if entry is None:
+                tried = self._tried.get(key)
+                due = 0.0 if tried is None else tried + RETRY_AFTER
+            else:
+                due = max(entry.checked_at, self._tried.get(key, 0)) + self._interval(key, now)
+            if due <= now:
+                return key
+            soonest = min(soonest, due)
+        self._quiet_until = soonest
+        return None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(WARM_TICK)
+            try:
+                await self._tick()
+            except Exception as e:
+                # anything unexpected must not end warming for the rest of the process
+                print(f"❌ Cache warming failed: {type(e).__name__}: {e}")
+
+    async def _tick(self):
+        if scheduler.queue_depth() or scheduler.breaker.is_open:
+            return  # real work waiting, or CF down
+        key = self.next_due()
+        if key is None:
+            return
+        self._tried[key] = time.time()  # also spaces out retries after unexpected errors
+        try:
+            await fetch_submissions(self.handles[key], priority=PRIORITY_BACKGROUND, raise_errors=True)
+        except CFHandleNotFound:
+            self.handles.pop(key, None)  # renamed or deleted on CF
+            self.order.pop(key, None)
+        except CFError:
+            pass  # retried after RETRY_AFTER
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+warmer = CacheWarmer()
@@ -0,0 +1,59 @@
+# worker.py
+import asyncio
+import os
+import signal
+import sys
+from backend import LocalBackend, serve, RPC_LINE_LIMIT
+
+SOCKET_PATH = os.getenv("CF_WORKER_SOCKET", "/tmp/cf-worker.sock")
+PARENT_CHECK_INTERVAL = 5  # seconds
+
+
+async def run(path=SOCKET_PATH, parent_pid=None):
+    """
+    Codeforces worker: owns the cfapi scheduler, submission caches and problem catalog, so multi-MB
+    response decoding never runs on the Discord gateway's loop. Any number of bot processes
+    (e.g. shards) can connect to the same socket and share its caches and rate limit.
+    """
+    impl = LocalBackend()
+    await impl.start()
+    if os.path.exists(path):
+        os.remove(path)  # stale socket from a previous run
+    server = await asyncio.start_unix_server(lambda r, w: serve(r, w, impl), path, limit=RPC_LINE_LIMIT)
+    print(f"✅ CF worker listening on {path}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    async def watch_parent():
+        # spawned by bot.py: exit with it instead of lingering as an orphan
+        while os.getppid() == parent_pid:
+            await asyncio.sleep(PARENT_CHECK_INTERVAL)
+        stop.set()
+
+    watcher = loop.create_task(watch_parent()) if parent_pid else None
+    try:
+        await stop.wait()
+    finally:
+        if watcher:
+            watcher.cancel()
+        server.close()
+        await server.wait_closed()
+        await impl.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+async def spawn(path=SOCKET_PATH):
+    """Start the worker as a child of the bot process (single Procfile entry); returns the Process."""
+    return await asyncio.create_subprocess_exec(
+        sys.executable, os.path.abspath(__file__), path, str(os.getpid()),
+    )
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else SOCKET_PATH
+    parent = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    asyncio.run(run(path, parent))